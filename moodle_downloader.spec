@@ -19,7 +19,7 @@ hiddenimports = [
     'playwright._impl._browser_context', 'playwright._impl._driver', 'playwright._impl._api_structures',
     'playwright._impl._errors', 'playwright._impl._helper', 'playwright._impl._api_types',
     'PyQt5', 'PyQt5.QtWidgets', 'PyQt5.QtCore', 'PyQt5.QtGui',
-    'bs4', 'lxml', 'keyring', 'keyring.backends', 'keyring.backends.Windows',
+    'lxml', 'keyring', 'keyring.backends', 'keyring.backends.Windows',
 ]
 
 a = Analysis(
@@ -1,10 +1,11 @@
+from pathlib import Path
 from setuptools import setup, find_packages
 
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
 
-with open("requirements.txt", "r", encoding="utf-8") as fh:
-    requirements = [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+requirements = [line for line in Path("requirements.txt").read_text(encoding="utf-8").splitlines()
+                if line and not line.startswith("#")]
 
 setup(
     name="moodle-downloader",
@@ -4,11 +4,12 @@ from __future__ import annotations
 import os
 import subprocess
 import sys
+from contextlib import ExitStack
 from functools import lru_cache
-from typing import Tuple
+from typing import Optional, Tuple
 
 try:
-    from playwright.sync_api import Error as PlaywrightError, sync_playwright
+    from playwright.sync_api import Error as PlaywrightError, Playwright, sync_playwright
 except ImportError as exc:  # pragma: no cover - environment issue
     raise RuntimeError("playwright is required to run MoodleDown") from exc
 
@@ -28,13 +29,20 @@ def _browser_store() -> str:
     return target
 
 
-def chromium_ready() -> bool:
-    """Fast check that Chromium can be launched."""
-    _browser_store()
+def _chromium_installed_on_disk() -> bool:
+    """Cheap check for a downloaded Chromium build in the browser store."""
+    root = _browser_store()
     try:
-        with sync_playwright() as playwright_sync:
-            browser = playwright_sync.chromium.launch(headless=True)
-            browser.close()
+        return any(entry.name.startswith("chromium") and entry.is_dir() for entry in os.scandir(root))
+    except OSError:
+        return False
+
+
+def _launch_check(playwright_sync: Playwright) -> bool:
+    """Launch and close headless Chromium with an already running driver."""
+    try:
+        browser = playwright_sync.chromium.launch(headless=True)
+        browser.close()
         return True
     except PlaywrightError:
         return False
@@ -42,6 +50,24 @@ def chromium_ready() -> bool:
         return False
 
 
+def chromium_ready(playwright_sync: Optional[Playwright] = None) -> bool:
+    """Fast check that Chromium can be launched.
+
+    Pass ``playwright_sync`` to reuse a running driver instead of starting one.
+    """
+    if not _chromium_installed_on_disk():
+        return False
+    if playwright_sync is not None:
+        return _launch_check(playwright_sync)
+    try:
+        with sync_playwright() as own_playwright:
+            return _launch_check(own_playwright)
+    except PlaywrightError:
+        return False
+    except Exception:
+        return False
+
+
 def _install_with_driver() -> Tuple[bool, str]:
     """Install Chromium using the bundled Playwright driver (PyInstaller safe)."""
     try:
@@ -99,15 +125,25 @@ def install_chromium() -> Tuple[bool, str]:
 
 
 def ensure_chromium() -> Tuple[bool, str]:
-    """Make sure Chromium exists and passes a launch check."""
-    if chromium_ready():
-        return True, "Chromium already installed"
-    success, message = install_chromium()
-    if not success:
-        return False, message
-    if chromium_ready():
-        return True, message
-    return False, "Chromium installation completed but launch verification failed"
+    """Make sure Chromium exists and passes a launch check.
+
+    The probe and the post-install verification share one Playwright driver.
+    """
+    _browser_store()  # The driver reads PLAYWRIGHT_BROWSERS_PATH when it starts
+    with ExitStack() as stack:
+        try:
+            playwright_sync = stack.enter_context(sync_playwright())
+        except Exception:
+            playwright_sync = None  # chromium_ready() will try with its own driver
+
+        if chromium_ready(playwright_sync):
+            return True, "Chromium already installed"
+        success, message = install_chromium()
+        if not success:
+            return False, message
+        if chromium_ready(playwright_sync):
+            return True, message
+        return False, "Chromium installation completed but launch verification failed"
 
 
 @lru_cache(maxsize=1)
@@ -1,9 +1,111 @@
 import re
+import sys
 import logging
-import os
-from typing import Dict, List, Set
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, urljoin
+from typing import Dict, List, Set, Optional
+from lxml import etree, html as lxml_html
+from urllib.parse import urljoin
+
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching elements whose class list contains ``name``"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Compiled once; evaluated per page, section and activity
+_SECTIONS_SEL = etree.XPath(
+    f"//*[(self::li or self::div) and {_has_class('main')}"
+    f" and ({_has_class('section')} or {_has_class('topic')} or {_has_class('week')})]")
+_COURSE_CONTENT_SECTIONS_SEL = etree.XPath(f"//div[{_has_class('course-content')}]/ul/li[{_has_class('section')}]")
+_REGION_MAIN_SECTIONS_SEL = etree.XPath(f"//div[@id='region-main']//*[{_has_class('section')}]")
+_SECTION_NAME_SEL = etree.XPath(
+    f".//h3[{_has_class('sectionname')}] | .//h4[{_has_class('sectionname')}]"
+    f" | .//*[{_has_class('section-title')}]//span[{_has_class('inplaceeditable')}]")
+_SUMMARY_SEL = etree.XPath(f"(.//*[{_has_class('summarytext')}])[1]")
+_ACTIVITY_SEL = etree.XPath(f".//*[(self::li or self::div) and {_has_class('activity')}]")
+_LINK_SEL = etree.XPath("(.//a[@href])[1]")
+_INSTANCE_NAME_SEL = etree.XPath(f"(.//span[{_has_class('instancename')}])[1]")
+_NESTED_SPAN_SEL = etree.XPath("(.//span)[1]")
+_ACTIVITY_INSTANCE_SEL = etree.XPath("ancestor::*[contains(@class, 'activityinstance')][1]")
+_ACTIVITY_ICON_SEL = etree.XPath(f"(.//img[{_has_class('activityicon')}])[1]")
+
+_INVALID_CHARS = '<>:"/\\|?*'
+_SECTION_TRANS = str.maketrans(dict.fromkeys(_INVALID_CHARS, '_'))
+_FS_TRANS = str.maketrans(dict.fromkeys(_INVALID_CHARS + ''.join(map(chr, range(32))), '_'))
+_NAME_PREFIX = re.compile(r"^(File|Folder| קובץ | תיקייה)\s*[:-]?\s*", re.IGNORECASE)
+
+_COMMON_EXTS = frozenset({'pdf', 'doc', 'docx', 'ppt', 'pptx', 'xls', 'xlsx', 'zip', 'rar', '7z', 'txt', 'csv',
+                          'jpg', 'jpeg', 'png', 'gif', 'mp4', 'mp3', 'mov'})
+
+# Ordered (substring, type) tables; the first matching entry wins
+_URL_TYPE_PATTERNS = (
+    ('folder/view.php', 'folder'),
+    ('/folder/', 'folder'),
+    ('assign/view.php', 'assignment'),  # Ignore
+    ('quiz/view.php', 'quiz'),  # Ignore
+    ('forum/view.php', 'forum'),  # Ignore
+    ('url/view.php', 'url'),  # External link
+)
+# Resource types that are never downloaded
+_SKIP_TYPES = frozenset({'ignore', 'unknown', 'assignment', 'quiz', 'forum', 'url', 'feedback', 'choice',
+                         'questionnaire', 'hvp'})
+_IGNORE_CLASSES = frozenset({'modtype_assign', 'modtype_quiz', 'modtype_forum', 'modtype_feedback', 'modtype_choice',
+                             'modtype_questionnaire', 'modtype_hvp'})
+_ICON_TYPE_PATTERNS = (
+    # Specific icon matches
+    ('/pdf-', 'pdf'),
+    ('/powerpoint-', 'powerpoint'),
+    ('/document-', 'word'),
+    ('/spreadsheet-', 'excel'),
+    ('/archive-', 'archive'),
+    ('/folder-', 'folder'),
+    ('/text-', 'text'),
+    ('/url-', 'url'),
+    # Fallback patterns
+    ('/pdf', 'pdf'),
+    ('/document', 'document'),
+    ('/word', 'word'),
+    ('/powerpoint', 'powerpoint'),
+    ('/spreadsheet', 'excel'),
+    ('/excel', 'excel'),
+    ('/archive', 'archive'),
+    ('/zip', 'archive'),
+    ('/folder', 'folder'),
+)
+
+
+def _url_path(url: str) -> str:
+    """Return urlparse(url).path using plain string searches"""
+    end = len(url)
+    for separator in '?#':
+        pos = url.find(separator, 0, end)
+        if pos != -1:
+            end = pos
+    start = 0
+    scheme_end = url.find('://', 0, end)
+    if scheme_end != -1:
+        start = url.find('/', scheme_end + 3, end)
+        if start == -1:
+            return ''
+    params = url.find(';', max(url.rfind('/', start, end), start), end)
+    if params != -1:
+        end = params
+    return url[start:end]
+
+
+def _first(elements: List) -> Optional[lxml_html.HtmlElement]:
+    return elements[0] if elements else None
+
+
+def _get_text(elem) -> str:
+    """Concatenate stripped text nodes, matching bs4's get_text(strip=True)
+
+    Not text_content().strip(): that keeps the whitespace between nodes, which would
+    turn e.g. "Lecture 1<span> File</span>" into a different resource name.
+    """
+    if not len(elem):  # Leaf element: its only text node is .text
+        return (elem.text or '').strip()
+    return "".join(text.strip() for text in elem.itertext())
 
 
 class ContentExtractor:
@@ -13,27 +115,26 @@ class ContentExtractor:
         self.logger = logging.getLogger("MoodleDownPlaywright")
         self.base_url = base_url
 
-    def extract_course_sections(self, soup: BeautifulSoup) -> List[Dict]:
+    def extract_course_sections(self, tree: lxml_html.HtmlElement) -> List[Dict]:
         """Extract course sections/categories from the Moodle page"""
         sections = []
         try:
             # Try various selectors for section elements
-            section_elements = soup.find_all(['li', 'div'], class_=lambda c: c and (
-                        'section' in c.split() or 'topic' in c.split() or 'week' in c.split()) and 'main' in c.split())
+            # One document walk; the fallbacks below only run when it finds nothing
+            section_elements = _SECTIONS_SEL(tree)
             if not section_elements:
-                section_elements = soup.select('div.course-content > ul > li.section')
+                section_elements = _COURSE_CONTENT_SECTIONS_SEL(tree)
             if not section_elements:
-                section_elements = soup.select('div#region-main .section')
+                section_elements = _REGION_MAIN_SECTIONS_SEL(tree)
 
             for section_idx, section_elem in enumerate(section_elements):
                 section_name = None
                 section_id = section_elem.get('id', f'section-{section_idx}')
 
                 # Try to find section name
-                name_candidates = section_elem.select(
-                    'h3.sectionname, h4.sectionname, .section-title span.inplaceeditable')
+                name_candidates = _SECTION_NAME_SEL(section_elem)
                 if name_candidates:
-                    section_name = name_candidates[0].get_text(strip=True)
+                    section_name = _get_text(name_candidates[0])
                 else:
                     section_name = section_elem.get('aria-label')  # Fallback
 
@@ -41,120 +142,107 @@ class ContentExtractor:
                 if not section_name:
                     if section_idx == 0:
                         general_keywords = ['כללי', 'general']
-                        section_summary = section_elem.find(class_='summarytext')
-                        is_general = section_summary and any(
-                            kw in section_summary.get_text(strip=True).lower() for kw in general_keywords)
+                        section_summary = _first(_SUMMARY_SEL(section_elem))
+                        is_general = section_summary is not None and any(
+                            kw in _get_text(section_summary).lower() for kw in general_keywords)
                         section_name = "General" if is_general else f"Section {section_idx}"
                     else:
                         section_name = f"Section {section_idx}"
 
-                section_name = re.sub(r'[<>:"/\\|?*]', '_', section_name).strip()
+                section_name = section_name.translate(_SECTION_TRANS).strip()
                 section_name = section_name if section_name else f"Section_{section_idx}"  # Ensure non-empty
+                section_name = sys.intern(section_name)  # Shared by every resource dict of the section
                 sections.append({'id': section_id, 'name': section_name, 'index': section_idx, 'element': section_elem})
 
             if not sections:  # Handle case where no specific sections found
                 self.logger.warning("Could not find specific section elements. Treating entire page as one section.")
-                sections.append({'id': 'course-content', 'name': 'Course Materials', 'index': 0, 'element': soup})
+                sections.append({'id': 'course-content', 'name': 'Course Materials', 'index': 0, 'element': tree})
 
             self.logger.info(f"Found {len(sections)} sections in the course page.")
         except Exception as e:
             self.logger.exception(f"Error extracting course sections: {str(e)}")
             if not sections:
-                sections.append({'id': 'default', 'name': 'Course Materials', 'index': 0, 'element': soup})
+                sections.append({'id': 'default', 'name': 'Course Materials', 'index': 0, 'element': tree})
 
         return sections
 
-    def extract_section_resources(self, section_elem, section_name: str, current_url: str) -> List[Dict]:
-        """Extract downloadable resources from a course section"""
-        resources = []
-        activities = section_elem.find_all(['li', 'div'], class_=lambda c: c and 'activity' in c.split())
-
-        for activity in activities:
-            link = activity.find('a', href=True)
-            if not link:
-                continue
-
-            url = link['href']
-            if not url.startswith('http'):
-                url = urljoin(current_url, url)
-
-            resource_type = self._detect_resource_type(link, url)
-            if resource_type in ['ignore', 'unknown', 'assignment', 'quiz', 'forum', 'url', 'feedback', 'choice',
-                                 'questionnaire', 'hvp']:
-                continue
-
-            instance_name = ""
-            instance_element = link.find('span', class_='instancename')
-            if instance_element:
-                instance_name = instance_element.get_text(strip=True)
-                if not instance_name:  # Check nested span
-                    nested_span = instance_element.find('span')
-                    if nested_span:
-                        instance_name = nested_span.get_text(strip=True)
-            if not instance_name:
-                instance_name = link.get_text(strip=True)  # Fallback to link text
-
-            if instance_name:  # Clean name
-                instance_name = re.sub(r"^(File|Folder| קובץ | תיקייה)\s*[:-]?\s*", "", instance_name,
-                                       flags=re.IGNORECASE).strip()
-                instance_name = re.sub(r'[<>:"/\\|?*\x00-\x1F]', '_', instance_name).strip('._ ')
-
-            if instance_name and url and not url.endswith('#'):
-                resources.append({
-                    'name': instance_name,
-                    'url': url,
-                    'section': section_name,
-                    'type': resource_type
-                })
-
-        return resources
+    def _extract_activity_resource(self, activity, section_name: str, current_url: str,
+                                   seen: Set[str], logged_urls: Set[str]) -> Optional[Dict]:
+        """Build the resource dict for one activity, or None if it is skipped"""
+        link = _first(_LINK_SEL(activity))
+        if link is None:
+            return None
+
+        url = link.get('href')
+        if not url.startswith('http'):
+            url = urljoin(current_url, url)
+        if url in seen:
+            return None
+
+        resource_type = self._detect_resource_type(link, url)
+        if resource_type in _SKIP_TYPES:
+            return None
+
+        instance_name = ""
+        instance_element = _first(_INSTANCE_NAME_SEL(link))
+        if instance_element is not None:
+            instance_name = _get_text(instance_element)
+            if not instance_name:  # Check nested span
+                nested_span = _first(_NESTED_SPAN_SEL(instance_element))
+                if nested_span is not None:
+                    instance_name = _get_text(nested_span)
+        if not instance_name:
+            instance_name = _get_text(link)  # Fallback to link text
+
+        if instance_name:  # Clean name
+            instance_name = _NAME_PREFIX.sub("", instance_name).strip()
+            instance_name = instance_name.translate(_FS_TRANS).strip('._ ')
+
+        if not (instance_name and url and not url.endswith('#')):
+            return None
+        seen.add(url)
+        if url in logged_urls:
+            return None
+        return {
+            'name': instance_name,
+            'url': url,
+            'section': section_name,
+            'type': resource_type
+        }
 
     def _detect_resource_type(self, link_elem, url):
         """Detect resource type from link element and URL"""
         href = url.lower()
 
         # Check URL patterns
-        if 'folder/view.php' in href or '/folder/' in href:
-            return 'folder'
-        if 'assign/view.php' in href:
-            return 'assignment'  # Ignore
-        if 'quiz/view.php' in href:
-            return 'quiz'  # Ignore
-        if 'forum/view.php' in href:
-            return 'forum'  # Ignore
-        if 'url/view.php' in href:
-            return 'url'  # External link
+        for pattern, url_type in _URL_TYPE_PATTERNS:
+            if pattern in href:
+                return url_type
 
         # Check parent element classes
-        activity_instance = link_elem.find_parent(class_=lambda c: c and 'activityinstance' in c)
-        if activity_instance:
-            parent_classes = activity_instance.get('class', [])
-            for pc in parent_classes:
-                if pc == 'modtype_folder':
-                    return 'folder'
-                if pc == 'modtype_url':
-                    return 'url'
-                if pc in ['modtype_assign', 'modtype_quiz', 'modtype_forum', 'modtype_feedback', 'modtype_choice',
-                          'modtype_questionnaire', 'modtype_hvp']:
-                    return 'ignore'
+        activity_instance = _first(_ACTIVITY_INSTANCE_SEL(link_elem))
+        if activity_instance is not None:
+            parent_classes = set(activity_instance.get('class', '').split())
+            if 'modtype_folder' in parent_classes:
+                return 'folder'
+            if 'modtype_url' in parent_classes:
+                return 'url'
+            if not _IGNORE_CLASSES.isdisjoint(parent_classes):
+                return 'ignore'
 
         # Check icon for clues
-        img = link_elem.find('img', class_='activityicon')
-        if img and 'src' in img.attrs:
-            doc_type = self._detect_doc_type_from_icon(img['src'].lower())
+        img = _first(_ACTIVITY_ICON_SEL(link_elem))
+        if img is not None and img.get('src') is not None:
+            doc_type = self._detect_doc_type_from_icon(img.get('src').lower())
             if doc_type:
                 return doc_type
 
         # Check file extension
-        parsed_path = urlparse(href).path
-        if parsed_path:
-            _, ext = os.path.splitext(parsed_path)
-            if ext and len(ext) > 1:
-                ext_lower = ext.lower()[1:]
-                common_exts = ['pdf', 'doc', 'docx', 'ppt', 'pptx', 'xls', 'xlsx', 'zip', 'rar', '7z', 'txt', 'csv',
-                               'jpg', 'jpeg', 'png', 'gif', 'mp4', 'mp3', 'mov']
-                if ext_lower in common_exts:
-                    return ext_lower
+        path_lower = _url_path(href)
+        stem, dot, ext_lower = path_lower.rpartition('.')
+        stem = stem.rstrip('.')  # Leading dots of a file name do not start an extension
+        if dot and ext_lower in _COMMON_EXTS and stem and not stem.endswith('/'):
+            return sys.intern(ext_lower)  # Fresh slice per URL; collapse to one string per type
 
         if 'resource/view.php' in href:
             return 'document'  # Default for generic resource
@@ -166,38 +254,7 @@ class ContentExtractor:
         if not icon_src:
             return None
 
-        # Specific icon matches
-        if '/pdf-' in icon_src:
-            return 'pdf'
-        if '/powerpoint-' in icon_src:
-            return 'powerpoint'
-        if '/document-' in icon_src:
-            return 'word'
-        if '/spreadsheet-' in icon_src:
-            return 'excel'
-        if '/archive-' in icon_src:
-            return 'archive'
-        if '/folder-' in icon_src:
-            return 'folder'
-        if '/text-' in icon_src:
-            return 'text'
-        if '/url-' in icon_src:
-            return 'url'
-
-        # Fallback patterns
-        icon_patterns = {
-            '/pdf': 'pdf',
-            '/document': 'document',
-            '/word': 'word',
-            '/powerpoint': 'powerpoint',
-            '/spreadsheet': 'excel',
-            '/excel': 'excel',
-            '/archive': 'archive',
-            '/zip': 'archive',
-            '/folder': 'folder'
-        }
-
-        for pattern, doc_type in icon_patterns.items():
+        for pattern, doc_type in _ICON_TYPE_PATTERNS:
             if pattern in icon_src:
                 return doc_type
 
@@ -206,35 +263,41 @@ class ContentExtractor:
     def get_download_links(self, html_content: str, current_url: str, logged_urls: Set[str]) -> Dict[str, Dict]:
         """Extract downloadable links from page and filter against already downloaded URLs"""
         to_download = {}
+        seen = set()
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            sections = self.extract_course_sections(soup)
+            tree = lxml_html.fromstring(html_content)
+            sections = self.extract_course_sections(tree)
 
             if not sections:
                 self.logger.error("No sections extracted from the page.")
                 return {}
 
-            for section in sections:
-                section_resources = self.extract_section_resources(section['element'], section['name'], current_url)
-                for resource in section_resources:
-                    url = resource['url']
-                    if url not in to_download:
-                        to_download[url] = resource
+            # One activity query for the whole page. Each activity belongs to its outermost
+            # enclosing section, which is the first section that would have listed it.
+            # Duplicates and already downloaded items are dropped during collection.
+            section_names = {section['element']: section['name'] for section in sections}
+            for activity in _ACTIVITY_SEL(tree):
+                section_name = None
+                for ancestor in activity.iterancestors():
+                    section_name = section_names.get(ancestor, section_name)
+                if section_name is None:
+                    continue  # Outside every course section
+                resource = self._extract_activity_resource(activity, section_name, current_url, seen, logged_urls)
+                if resource:
+                    to_download[resource['url']] = resource
 
-            self.logger.info(f"Found {len(to_download)} potential downloadable items across {len(sections)} sections.")
+            self.logger.info(f"Found {len(seen)} potential downloadable items across {len(sections)} sections.")
 
             # Filter out already downloaded items
-            initial_count = len(to_download)
-            filtered_downloads = {url: item for url, item in to_download.items() if url not in logged_urls}
-            filtered_count = initial_count - len(filtered_downloads)
+            filtered_count = len(seen) - len(to_download)
 
             if filtered_count > 0:
                 self.logger.info(f"Filtered out {filtered_count} items found in the verified central log.")
             else:
                 self.logger.info("No items filtered based on the verified central log.")
 
-            self.logger.info(f"{len(filtered_downloads)} items remain after filtering.")
-            return filtered_downloads
+            self.logger.info(f"{len(to_download)} items remain after filtering.")
+            return to_download
 
         except Exception as e:
             self.logger.exception(f"Error extracting download links: {str(e)}")
@@ -3,11 +3,59 @@ Course extraction module for Moodle Downloader.
 Extracts course list from Moodle dashboard HTML.
 """
 
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 from typing import List, Dict
 
 
-def extract_courses(html_content: str) -> list[dict]:
+def _has_class(name: str) -> str:
+    """XPath predicate matching elements whose class list contains ``name``"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Hidden accessibility helpers that leak into the visible course label
+_HIDDEN_NODES = etree.XPath(".//*[" + " or ".join(
+    _has_class(name) for name in ('sr-only', 'visually-hidden', 'accesshide')) + "]")
+
+# Course rows in the overview block and the course-name link inside each row
+_COURSE_ROWS = etree.XPath(f".//li[{_has_class('course-listitem')}]")
+_COURSE_LINK = etree.XPath(f"(.//a[{_has_class('coursename')}])[1]")
+
+# Dashboard HTML is fed to the pull parser in chunks of this many characters
+_FEED_CHUNK_SIZE = 64 * 1024
+
+# Star-status text that some Moodle themes inject before the course name, longest first
+_STATUS_PREFIXES = (
+    'Course is not starred',
+    'Course not starred',
+    'Course is starred',
+    'Course starred',
+)
+
+
+def _parse_overview_section(html_content: str):
+    """
+    Incrementally parse the page and return the first 'myoverview' section element,
+    or None. Parsing stops as soon as that section closes, so the rest of the page
+    (footer, inline scripts) is never built into a tree.
+    """
+    parser = etree.HTMLPullParser(events=('end',), tag='section')
+    parser.set_element_class_lookup(lxml_html.HtmlElementClassLookup())
+    for start in range(0, len(html_content), _FEED_CHUNK_SIZE):
+        parser.feed(html_content[start:start + _FEED_CHUNK_SIZE])
+        for _, section in parser.read_events():
+            if section.get('data-block') == 'myoverview':
+                return section
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:  # Empty document
+        return None
+    for _, section in parser.read_events():
+        if section.get('data-block') == 'myoverview':
+            return section
+    return None
+
+
+def extract_courses(html_content: str) -> List[Dict]:
     """
     Parses HTML from a Moodle page to find the 'myoverview' block
     and extract the course names and their links.
@@ -19,50 +67,35 @@ def extract_courses(html_content: str) -> list[dict]:
         A list of dictionaries, where each dictionary contains the 'name'
         and 'href' of a course. Returns an empty list if the block is not found.
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
     course_list = []
 
     # 1. Find the main section container using the data-block attribute
-    overview_section = soup.find('section', attrs={'data-block': 'myoverview'})
-    if overview_section:
+    overview_section = _parse_overview_section(html_content)
+    if overview_section is not None:
         # 2. Find all list items that represent a course
         # The class 'course-listitem' is a good identifier for each row
-        course_rows = overview_section.find_all('li', class_='course-listitem')
+        course_rows = _COURSE_ROWS(overview_section)
 
         for row in course_rows:
             # 3. Within each row, find the anchor tag (<a>) with the course name
-            link_tag = row.find('a', class_='coursename')
-            
-            # 4. Extract the name and href if the tag is found
-            if link_tag and link_tag.has_attr('href'):
-                # Remove hidden accessibility helpers that leak into the visible label
-                hidden_classnames = {'sr-only', 'visually-hidden', 'accesshide'}
-
-                def has_hidden_class(class_attr: str | list[str] | None) -> bool:
-                    if not class_attr:
-                        return False
-                    if isinstance(class_attr, (list, tuple, set)):
-                        return bool(hidden_classnames.intersection(class_attr))
-                    return class_attr in hidden_classnames
+            link_tags = _COURSE_LINK(row)
+            link_tag = link_tags[0] if link_tags else None
 
-                for hidden_node in link_tag.find_all(class_=has_hidden_class):
-                    hidden_node.decompose()
+            # 4. Extract the name and href if the tag is found
+            if link_tag is not None and link_tag.get('href') is not None:
+                # Remove hidden accessibility helpers; drop_tree keeps their tail text
+                for hidden_node in _HIDDEN_NODES(link_tag):
+                    hidden_node.drop_tree()
 
-                course_name = link_tag.get_text(separator=' ', strip=True)
+                course_name = " ".join(text.strip() for text in link_tag.itertext() if text.strip())
 
                 # Guard against prefixed star-status text that some Moodle themes inject
-                status_prefixes = (
-                    'Course is starred',
-                    'Course is not starred',
-                    'Course not starred',
-                    'Course starred',
-                )
-                for prefix in status_prefixes:
+                for prefix in _STATUS_PREFIXES:
                     if course_name.startswith(prefix):
                         course_name = course_name[len(prefix):].strip()
                         break
 
-                course_href = link_tag['href']
+                course_href = link_tag.get('href')
 
                 course_list.append({
                     'name': course_name,
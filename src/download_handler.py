@@ -1,11 +1,14 @@
 import os
 import re
 import time
+import threading
 import logging
 import mimetypes
 import http.client
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Tuple, List, Optional, Callable, Set
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 from urllib.parse import urlparse, unquote, urljoin
 from playwright.sync_api import APIResponse, TimeoutError as PlaywrightTimeoutError, Error as PlaywrightError
 
@@ -13,74 +16,129 @@ from .data_structures import DownloadResult
 from .moodle_browser import MoodleBrowser
 from .file_operations import sanitize_folder_name
 
+_RE_CD_UTF8 = re.compile(r"filename\*=UTF-8''([^;]+)", re.IGNORECASE)
+_RE_CD_STD = re.compile(r'filename="([^"]+)"', re.IGNORECASE)
+_RE_CD_NOQ = re.compile(r'filename=([^;]+)', re.IGNORECASE)
+_RE_FN_SANITIZE = re.compile(r'[<>:"/\\|?*\x00-\x1F]')
+
+# Cheap raw-text check: pages without any of these cannot hold an embedded resource
+_RE_EMBED_HINT = re.compile(r'<(?:iframe|object)\b|pluginfile\.php', re.IGNORECASE)
+# Every element that can point at the embedded resource of an intermediate page, in document order
+_EMBED_CANDIDATES_SEL = etree.XPath(
+    "//iframe | //object[@type='application/pdf'] | //*[@id='region-main'] | //a[contains(@href, 'pluginfile.php')]")
+
+
+def _list_dir_names(directory: str) -> Set[str]:
+    """Case-normalized names of the entries in directory, empty if it cannot be listed"""
+    try:
+        with os.scandir(directory or '.') as entries:
+            return {os.path.normcase(entry.name) for entry in entries}
+    except OSError:
+        return set()
+
+
+mimetypes.init()  # Load the system MIME tables now rather than during the first download
+_guess_extension = lru_cache(maxsize=128)(mimetypes.guess_extension)
+
+_PATH_SEPS = ('/', os.sep) + ((os.altsep,) if os.altsep else ())
+
+
+def _split_ext(path: str) -> Tuple[str, str]:
+    """os.path.splitext via one rpartition; the extension is returned without its dot"""
+    root, dot, ext = path.rpartition('.')
+    stem = root.rstrip('.')  # Leading dots of a file name do not start an extension
+    if not dot or not stem or stem.endswith(_PATH_SEPS) or any(sep in ext for sep in _PATH_SEPS):
+        return path, ''
+    return root, ext
+
+
+def _find_embedded_urls(tree: lxml_html.HtmlElement) -> Tuple[Optional[str], Optional[str]]:
+    """Return the embedded resource URL and the first pluginfile link of an intermediate page
+
+    The embedded resource is, in order of preference, the src of the resourceobject
+    iframe, of the resourceworkarea iframe, the data of a PDF object, or the src of the
+    first iframe in region-main (or in the page when it has no region-main).
+    """
+    resource_iframe = workarea_iframe = first_iframe = main_iframe = None
+    main_region = pdf_object = plugin_href = None
+    for elem in _EMBED_CANDIDATES_SEL(tree):
+        if elem.tag == 'iframe':
+            if resource_iframe is None and elem.get('id') == 'resourceobject':
+                resource_iframe = elem
+            if workarea_iframe is None and 'resourceworkarea' in elem.get('class', '').split():
+                workarea_iframe = elem
+            if first_iframe is None:
+                first_iframe = elem
+            if main_iframe is None and main_region is not None and main_region in elem.iterancestors():
+                main_iframe = elem
+        elif elem.tag == 'object' and elem.get('type') == 'application/pdf':
+            if pdf_object is None:
+                pdf_object = elem
+        elif elem.tag == 'a' and 'pluginfile.php' in elem.get('href', ''):
+            if plugin_href is None:
+                plugin_href = elem.get('href')
+        if main_region is None and elem.get('id') == 'region-main':
+            main_region = elem
+
+    embedded_url = None
+    iframe = resource_iframe if resource_iframe is not None else workarea_iframe
+    if iframe is None:
+        embedded_url = pdf_object.get('data') if pdf_object is not None else None
+        if not embedded_url:
+            iframe = main_iframe if main_region is not None else first_iframe  # Fallbacks
+    if iframe is not None and iframe.get('src'):
+        embedded_url = iframe.get('src')
+    return embedded_url or None, plugin_href
+
+
+def _parse_html(text: str) -> Optional[lxml_html.HtmlElement]:
+    """Parse an HTML page, None if it has no content"""
+    try:
+        return lxml_html.fromstring(text)
+    except (etree.ParserError, ValueError):
+        return None
+
 
 class DownloadHandler:
     """Handles downloading files from Moodle and tracking download history"""
     LOG_SEPARATOR = "\t"  # Separator for URL and Filename in log
+    LOG_FLUSH_EVERY = 16  # Pending log entries written per batch
+    VERIFY_WORKERS = 16  # Threads checking that logged files still exist
+    REWRITE_STALE_FRACTION = 0.1  # Share of stale log lines that triggers a rewrite
+    MIN_REQUEST_INTERVAL = 0.8  # Seconds between the starts of consecutive downloads
 
-    def __init__(self, moodle_browser: MoodleBrowser, central_download_log_file: str):
+    def __init__(self, moodle_browser: MoodleBrowser, central_download_log_file: str,
+                 logged_urls: Optional[Set[str]] = None, log_lock: Optional[threading.Lock] = None):
         self.moodle_browser = moodle_browser
         self.api_request_context = moodle_browser.api_request_context
         self.central_download_log_file = central_download_log_file
         self.logger = logging.getLogger("MoodleDownPlaywright")
-        self._logged_urls = self._load_and_verify_logged_urls()
-
-    def _load_and_verify_logged_urls(self) -> Set[str]:
-        """Load previously downloaded URLs from log, verify files exist"""
-        logged_urls = set()
-        valid_log_entries = []
-        lines_read = 0
-        removed_count = 0
-
-        if not os.path.exists(self.central_download_log_file):
-            self.logger.warning(
-                f"Central download log file '{self.central_download_log_file}' not found. Starting fresh.")
-            return logged_urls
-
+        # Callers that already loaded the log (see get_logged_urls_from_file) pass the set in
+        self._logged_urls = logged_urls if logged_urls is not None else get_logged_urls_from_file(
+            central_download_log_file)
+        self._pending_log: List[str] = []  # Entries not yet appended to the central log
+        # Handlers running in parallel against one central log share a lock so appends don't interleave
+        self._log_lock = log_lock if log_lock is not None else threading.Lock()
+        self._last_request_start = 0.0
+        self._ensured_dirs: Set[str] = set()  # Directories already created or verified
+
+    def flush_log(self):
+        """Append pending entries to the central log file in a single write"""
+        if not self._pending_log:
+            return
         try:
-            with open(self.central_download_log_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    lines_read += 1
-                    stripped_line = line.strip()
-                    if not stripped_line:
-                        continue
-
-                    parts = stripped_line.split(self.LOG_SEPARATOR, 1)
-                    if len(parts) == 2:
-                        url, filepath = parts[0].strip(), parts[1].strip()
-                        if url and filepath:
-                            # Verify file still exists
-                            if os.path.exists(filepath):
-                                logged_urls.add(url)
-                                valid_log_entries.append(stripped_line)  # Keep the original valid line
-                            else:
-                                self.logger.info(f"Logged file missing: '{filepath}'. Removing entry for URL: {url}")
-                                removed_count += 1
-                        else:
-                            self.logger.warning(f"Skipping malformed log entry (empty url/path): {stripped_line}")
-                    else:
-                        self.logger.warning(f"Skipping malformed log entry (incorrect format): {stripped_line}")
-
-            self.logger.info(
-                f"Loaded {len(logged_urls)} URLs from verified entries in '{self.central_download_log_file}'.")
-
-            # Rewrite log file only if entries were removed
-            if removed_count > 0:
-                self.logger.info(f"Rewriting log to remove {removed_count} entries for missing files.")
-                try:
-                    with open(self.central_download_log_file, 'w', encoding='utf-8') as f_rewrite:
-                        for valid_line in valid_log_entries:
-                            f_rewrite.write(valid_line + '\n')
-                    self.logger.info("Central download log cleaned successfully.")
-                except IOError as e_write:
-                    self.logger.error(f"Error rewriting cleaned download log file: {e_write}")
-            else:
-                self.logger.info("No missing files found in log entries.")
-
-        except IOError as e_read:
-            self.logger.error(f"Error reading download log file: {e_read}")
+            with self._log_lock, open(self.central_download_log_file, 'a', encoding='utf-8') as f_log:
+                f_log.write(''.join(self._pending_log))
+            self._pending_log.clear()
+        except IOError as e:
+            self.logger.error(f"Failed to write to central log file: {e}")
 
-        return logged_urls
+    def _throttle(self):
+        """Wait until MIN_REQUEST_INTERVAL has passed since the previous download started"""
+        wait = self._last_request_start + self.MIN_REQUEST_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request_start = time.monotonic()
 
     def get_logged_urls(self) -> Set[str]:
         """Return the set of already downloaded URLs"""
@@ -93,7 +151,7 @@ class DownloadHandler:
             return None
 
         # Try RFC 5987 first (UTF-8 encoding)
-        match_utf8 = re.search(r"filename\*=UTF-8''([^;]+)", content_disposition, re.IGNORECASE)
+        match_utf8 = _RE_CD_UTF8.search(content_disposition)
         if match_utf8:
             try:
                 return unquote(match_utf8.group(1), encoding='utf-8').strip()
@@ -101,7 +159,7 @@ class DownloadHandler:
                 self.logger.warning(f"Failed to decode RFC 5987 filename: {match_utf8.group(1)} - {e}")
 
         # Try standard filename="..."
-        match_std = re.search(r'filename="([^"]+)"', content_disposition, re.IGNORECASE)
+        match_std = _RE_CD_STD.search(content_disposition)
         if match_std:
             filename = match_std.group(1)
             try:  # Attempt decoding common issues
@@ -117,7 +175,7 @@ class DownloadHandler:
             return filename.strip()
 
         # Try filename=... (no quotes)
-        match_noq = re.search(r'filename=([^;]+)', content_disposition, re.IGNORECASE)
+        match_noq = _RE_CD_NOQ.search(content_disposition)
         if match_noq:
             return match_noq.group(1).strip()
 
@@ -132,38 +190,38 @@ class DownloadHandler:
         # Try to get filename from HTTP headers
         header_filename = self._get_filename_from_headers(response.headers)
         if header_filename:
-            name_part, ext_part = os.path.splitext(header_filename)
+            name_part, ext_part = _split_ext(header_filename)
             if ext_part:
-                filename, ext = name_part, ext_part.lower().lstrip('.')
+                filename, ext = name_part, ext_part.lower()
             else:
                 filename = header_filename
-            self.logger.info(f"Using filename from Content-Disposition: name='{filename}', ext='{ext}'")
+            self.logger.debug("Using filename from Content-Disposition: name='%s', ext='%s'", filename, ext)
 
         if not filename:
             filename = suggested_name
-            self.logger.info(f"Using suggested name from page: '{filename}'")
+            self.logger.debug("Using suggested name from page: '%s'", filename)
 
         # Determine extension if not found in header filename
         if not ext:
             parsed_url = urlparse(response.url)  # Use final URL after redirects
-            _, url_ext = os.path.splitext(parsed_url.path)
-            if url_ext and len(url_ext) > 1:
-                ext = url_ext.lower().lstrip('.')
-                self.logger.info(f"Using extension '{ext}' from URL path.")
+            _, url_ext = _split_ext(parsed_url.path)
+            if url_ext:
+                ext = url_ext.lower()
+                self.logger.debug("Using extension '%s' from URL path.", ext)
 
         # Try Content-Type if extension still not determined
         if not ext:
             content_type = response.headers.get('content-type', '').split(';')[0].strip()
             if content_type:
-                guessed_ext = mimetypes.guess_extension(content_type)
+                guessed_ext = _guess_extension(content_type)
                 if guessed_ext:
                     ext = guessed_ext.lower().lstrip('.')
-                    self.logger.info(f"Using extension '{ext}' from Content-Type: {content_type}")
+                    self.logger.debug("Using extension '%s' from Content-Type: %s", ext, content_type)
 
         # Force .zip for folders
         if resource_type == 'folder' or 'download_folder.php' in url:
             if ext != 'zip':
-                self.logger.info(f"Resource type is folder, ensuring extension is 'zip' (was '{ext}').")
+                self.logger.debug("Resource type is folder, ensuring extension is 'zip' (was '%s').", ext)
                 ext = 'zip'
 
         # Default extension if still not determined
@@ -172,7 +230,7 @@ class DownloadHandler:
             ext = 'bin'
 
         # Clean the filename
-        filename = re.sub(r'[<>:"/\\|?*\x00-\x1F]', '_', filename).strip('._ ')
+        filename = _RE_FN_SANITIZE.sub('_', filename).strip('._ ')
         filename = filename if filename else "downloaded_file"  # Ensure non-empty
 
         return filename, ext
@@ -187,9 +245,9 @@ class DownloadHandler:
         # Adjust URL for folder downloads
         if resource_type == 'folder' and 'view.php' in current_url_to_fetch and '?id=' in current_url_to_fetch:
             current_url_to_fetch = current_url_to_fetch.replace('view.php', 'download_folder.php')
-            self.logger.info(f"Adjusted folder URL for download: {current_url_to_fetch}")
+            self.logger.info("Adjusted folder URL for download: %s", current_url_to_fetch)
 
-        self.logger.info(f"Attempting download: {suggested_name} from {current_url_to_fetch}")
+        self.logger.info("Attempting download: %s from %s", suggested_name, current_url_to_fetch)
         if not self.api_request_context:
             return DownloadResult(False, "APIRequestContext not available")
 
@@ -200,7 +258,6 @@ class DownloadHandler:
             # Initial request
             response = self.api_request_context.get(
                 current_url_to_fetch,
-                headers=self.moodle_browser.headers,
                 timeout=120000
             )
 
@@ -211,42 +268,30 @@ class DownloadHandler:
 
             if response.ok and is_html_page and is_intermediate_page:
                 self.logger.info(
-                    f"Initial fetch returned HTML page for {suggested_name}. Checking for embedded resource...")
-                soup = BeautifulSoup(response.text(), 'html.parser')
+                    "Initial fetch returned HTML page for %s. Checking for embedded resource...", suggested_name)
+                page_text = response.text()
+                tree = _parse_html(page_text) if _RE_EMBED_HINT.search(page_text) else None
 
                 # Look for iframe or object tag with embedded content
-                iframe_src_url = None
-                iframe = soup.find('iframe', id='resourceobject') or soup.find('iframe', class_='resourceworkarea')
-
-                if not iframe:
-                    obj_tag = soup.find('object', type='application/pdf')
-                    iframe_src_url = obj_tag['data'] if obj_tag and obj_tag.get('data') else None
-
-                if not iframe and not iframe_src_url:
-                    main_region = soup.find(id='region-main')
-                    iframe = main_region.find('iframe') if main_region else soup.find('iframe')  # Fallbacks
-
-                if iframe and iframe.get('src'):
-                    iframe_src_url = iframe['src']
+                iframe_src_url, plugin_href = _find_embedded_urls(tree) if tree is not None else (None, None)
 
                 if iframe_src_url:
-                    self.logger.info(f"Found embedded resource source: {iframe_src_url}")
+                    self.logger.info("Found embedded resource source: %s", iframe_src_url)
                 else:
                     # Try pluginfile link as fallback
-                    plugin_link = soup.select_one('a[href*="pluginfile.php"]')
-                    if plugin_link:
-                        iframe_src_url = plugin_link['href']
-                        self.logger.info(f"Found pluginfile link within embed page: {iframe_src_url}")
+                    if plugin_href is not None:
+                        iframe_src_url = plugin_href
+                        self.logger.info("Found pluginfile link within embed page: %s", iframe_src_url)
                     else:
                         self.logger.warning(f"Could not find embedded resource in HTML page for {suggested_name}.")
 
                 if iframe_src_url:
                     # Make the URL absolute if it's relative
                     iframe_src_url = urljoin(response.url, iframe_src_url)
-                    self.logger.info(f"Fetching actual resource from embedded URL: {iframe_src_url}")
+                    self.logger.info("Fetching actual resource from embedded URL: %s", iframe_src_url)
+                    self._dispose_response(response)  # Embed page is no longer needed
                     response = self.api_request_context.get(
                         iframe_src_url,
-                        headers=self.moodle_browser.headers,
                         timeout=120000
                     )
 
@@ -276,15 +321,19 @@ class DownloadHandler:
             final_filepath = os.path.join(target_dir, final_filename)
 
             # Ensure the directory exists
-            os.makedirs(target_dir, exist_ok=True)
-
-            # Write file
-            file_content = response.body()
-            self.logger.info(f"Saving file to: {final_filepath} (overwriting if exists)")
+            if target_dir not in self._ensured_dirs:
+                os.makedirs(target_dir, exist_ok=True)
+                self._ensured_dirs.add(target_dir)
+
+            # Write file; an announced empty body needs no round trip to the driver
+            file_content = b'' if response.headers.get('content-length') == '0' else response.body()
+            self._dispose_response(response)  # Release the driver's copy before writing ours out
+            self.logger.debug("Saving file to: %s (overwriting if exists)", final_filepath)
             with open(final_filepath, 'wb') as f:
                 f.write(file_content)
 
             filesize = len(file_content)
+            del file_content
 
             # Determine result
             if filesize > 0:
@@ -298,15 +347,12 @@ class DownloadHandler:
 
             # Log successful downloads to central file
             if result.success:
-                try:
-                    # Log the original URL and the final file path
-                    log_entry = f"{initial_url}{self.LOG_SEPARATOR}{result.filepath}\n"
-                    with open(self.central_download_log_file, 'a', encoding='utf-8') as f_log:
-                        f_log.write(log_entry)
-                    self._logged_urls.add(initial_url)  # Add to in-memory set too
-                    self.logger.info(f"Added to central log: {initial_url} -> {result.filepath}")
-                except IOError as e:
-                    self.logger.error(f"Failed to write to central log file: {e}")
+                # Log the original URL and the final file path; written out in batches
+                self._pending_log.append(f"{initial_url}{self.LOG_SEPARATOR}{result.filepath}\n")
+                self._logged_urls.add(initial_url)  # Add to in-memory set too
+                self.logger.debug("Added to central log: %s -> %s", initial_url, result.filepath)
+                if len(self._pending_log) >= self.LOG_FLUSH_EVERY:
+                    self.flush_log()
 
             return result
 
@@ -322,6 +368,20 @@ class DownloadHandler:
             failed_url = response.url if response else current_url_to_fetch
             self.logger.exception(f"Unexpected error downloading {suggested_name} ({failed_url}): {str(e)}")
             return DownloadResult(False, f"Unexpected error: {e}")
+        finally:
+            if response:
+                self._dispose_response(response)
+
+    def _dispose_response(self, response: APIResponse):
+        """Free a response body held by the Playwright driver
+
+        Bodies otherwise stay in driver memory until the browser context closes, which
+        for a full course means every downloaded file at once.
+        """
+        try:
+            response.dispose()
+        except PlaywrightError as e:
+            self.logger.debug("Could not dispose response for %s: %s", response.url, e)
 
     def download_files(self,
                        to_download: Dict[str, Dict],
@@ -350,6 +410,7 @@ class DownloadHandler:
                 section_path = os.path.join(base_download_folder, section_folder_name)
                 try:
                     os.makedirs(section_path, exist_ok=True)
+                    self._ensured_dirs.add(section_path)
                     section_folders[section_name] = section_path
                 except OSError as e:
                     self.logger.error(f"Failed to create section folder '{section_path}': {e}. Using base folder.")
@@ -358,6 +419,7 @@ class DownloadHandler:
             # Just ensure the base course folder exists
             try:
                 os.makedirs(base_download_folder, exist_ok=True)
+                self._ensured_dirs.add(base_download_folder)
             except OSError as e:
                 self.logger.error(f"Failed to create base download folder '{base_download_folder}': {e}.")
 
@@ -365,51 +427,51 @@ class DownloadHandler:
         sorted_items = sorted(to_download.items(),
                               key=lambda item: (item[1].get('section', ''), item[1].get('name', '')))
 
-        for url, item_info in sorted_items:
-            processed_count += 1
-            doc_name = item_info.get('name', 'Unknown Name')
-            section = item_info.get('section', 'Course Materials')
-            resource_type = item_info.get('type', 'unknown')
-
-            self.logger.info(
-                f"Processing item {processed_count}/{total_files}: '{doc_name}' (Type: {resource_type}, Section: {section})")
-
-            # Update progress display
-            current_progress = (processed_count - 1) / total_files * 100 if total_files > 0 else 0
-            if progress_callback:
-                progress_callback(f"Processing: {doc_name}", current_progress)
+        try:
+            for url, item_info in sorted_items:
+                processed_count += 1
+                doc_name = item_info.get('name', 'Unknown Name')
+                section = item_info.get('section', 'Course Materials')
+                resource_type = item_info.get('type', 'unknown')
 
-            # Determine target directory (section or base folder)
-            target_dir = section_folders.get(section,
-                                             base_download_folder) if organize_by_section else base_download_folder
-            sanitized_base_name = re.sub(r'[<>:"/\\|?*\x00-\x1F]', '_', doc_name).strip('._ ')
+                self.logger.info("Processing item %d/%d: '%s' (Type: %s, Section: %s)",
+                                 processed_count, total_files, doc_name, resource_type, section)
 
-            # Base path without extension
-            initial_filepath_suggestion = os.path.join(target_dir, sanitized_base_name)
+                # Update progress display
+                current_progress = (processed_count - 1) / total_files * 100 if total_files > 0 else 0
+                if progress_callback:
+                    progress_callback(f"Processing: {doc_name}", current_progress)
 
-            if progress_callback:
-                progress_callback(f"Starting download: {doc_name}",
-                                  current_progress + (20.0 / total_files) if total_files > 0 else current_progress)
+                # Determine target directory (section or base folder); section_folders is empty when not organizing
+                target_dir = section_folders.get(section, base_download_folder)
+                sanitized_base_name = _RE_FN_SANITIZE.sub('_', doc_name).strip('._ ')
 
-            # Download the file
-            result = self.download_file(item_info, initial_filepath_suggestion)
-            final_doc_name = os.path.basename(result.filepath) if result.filepath else f"{sanitized_base_name}_FAILED"
-            progress_pct_done = processed_count / total_files * 100 if total_files > 0 else 100
+                # Base path without extension
+                initial_filepath_suggestion = os.path.join(target_dir, sanitized_base_name)
 
-            if result.success:
-                self.logger.info(f"Success {processed_count}/{total_files}: Downloaded '{final_doc_name}'")
-                successful.append(final_doc_name)
                 if progress_callback:
-                    progress_callback(f"Downloaded: {final_doc_name}", progress_pct_done)
-            else:
-                self.logger.error(f"Failed {processed_count}/{total_files}: '{doc_name}' - Reason: {result.message}")
-                original_url_for_error = item_info.get('url', 'N/A')
-                failed.append(f"'{doc_name}' (Section: {section}, URL: {original_url_for_error}) - {result.message}")
-                if progress_callback:
-                    progress_callback(f"Failed: {doc_name} - {result.message}", progress_pct_done)
-
-            # Small delay between downloads
-            time.sleep(0.8)
+                    progress_callback(f"Starting download: {doc_name}",
+                                      current_progress + (20.0 / total_files) if total_files > 0 else current_progress)
+
+                # Download the file
+                self._throttle()
+                result = self.download_file(item_info, initial_filepath_suggestion)
+                final_doc_name = os.path.basename(result.filepath) if result.filepath else f"{sanitized_base_name}_FAILED"
+                progress_pct_done = processed_count / total_files * 100 if total_files > 0 else 100
+
+                if result.success:
+                    self.logger.info("Success %d/%d: Downloaded '%s'", processed_count, total_files, final_doc_name)
+                    successful.append(final_doc_name)
+                    if progress_callback:
+                        progress_callback(f"Downloaded: {final_doc_name}", progress_pct_done)
+                else:
+                    self.logger.error(f"Failed {processed_count}/{total_files}: '{doc_name}' - Reason: {result.message}")
+                    original_url_for_error = item_info.get('url', 'N/A')
+                    failed.append(f"'{doc_name}' (Section: {section}, URL: {original_url_for_error}) - {result.message}")
+                    if progress_callback:
+                        progress_callback(f"Failed: {doc_name} - {result.message}", progress_pct_done)
+        finally:
+            self.flush_log()  # Persist whatever was downloaded, even if interrupted
 
         # Final report
         self.logger.info(f"Download process finished for {total_files} items.")
@@ -421,4 +483,75 @@ class DownloadHandler:
                 self.logger.warning(f"- {failure}")
             self.logger.warning("--- End of Failed Downloads ---")
 
-        return successful, [], failed
\ No newline at end of file
+        return successful, [], failed
+
+
+def get_logged_urls_from_file(central_download_log_file: str) -> Set[str]:
+    """Load previously downloaded URLs from the central log, verify files exist"""
+    logger = logging.getLogger("MoodleDownPlaywright")
+    logged_urls = set()
+    valid_log_entries = []
+    lines_read = 0
+    removed_count = 0
+
+    if not os.path.exists(central_download_log_file):
+        logger.warning(
+            f"Central download log file '{central_download_log_file}' not found. Starting fresh.")
+        return logged_urls
+
+    try:
+        lines_read, entries = _read_log_entries(central_download_log_file)
+
+        # Verify files still exist by listing each directory once instead of a stat per file
+        directories = list({os.path.dirname(filepath) for _, filepath, _ in entries})
+        with ThreadPoolExecutor(max_workers=DownloadHandler.VERIFY_WORKERS) as executor:
+            listings = dict(zip(directories, executor.map(_list_dir_names, directories)))
+
+        for url, filepath, stripped_line in entries:
+            directory, name = os.path.split(filepath)
+            if os.path.normcase(name) in listings[directory]:
+                logged_urls.add(url)
+                valid_log_entries.append(stripped_line)  # Keep the original valid line
+            else:
+                logger.info("Logged file missing: '%s'. Removing entry for URL: %s", filepath, url)
+                removed_count += 1
+
+        logger.info(
+            f"Loaded {len(logged_urls)} URLs from verified entries in '{central_download_log_file}'.")
+
+        # Rewrite log file only once enough entries are stale; the rest are skipped on load meanwhile
+        if removed_count > 0 and removed_count > lines_read * DownloadHandler.REWRITE_STALE_FRACTION:
+            logger.info(f"Rewriting log to remove {removed_count} entries for missing files.")
+            try:
+                with open(central_download_log_file, 'w', encoding='utf-8') as f_rewrite:
+                    f_rewrite.write(''.join(valid_line + '\n' for valid_line in valid_log_entries))
+                logger.info("Central download log cleaned successfully.")
+            except IOError as e_write:
+                logger.error(f"Error rewriting cleaned download log file: {e_write}")
+        elif removed_count > 0:
+            logger.info(f"Keeping {removed_count} entries for missing files until more accumulate.")
+        else:
+            logger.info("No missing files found in log entries.")
+
+    except IOError as e_read:
+        logger.error(f"Error reading download log file: {e_read}")
+
+    return logged_urls
+
+
+def _read_log_entries(central_download_log_file: str) -> Tuple[int, List[Tuple[str, str, str]]]:
+    """Return the non-empty line count and (url, filepath, original line) entries of the central log"""
+    logger = logging.getLogger("MoodleDownPlaywright")
+    with open(central_download_log_file, 'r', encoding='utf-8') as f:
+        raw_lines = f.read().split('\n')
+
+    # Well-formed entries, parsed with C string methods
+    lines = [line for line in map(str.strip, raw_lines) if line]
+    separator = DownloadHandler.LOG_SEPARATOR
+    entries = [(url, filepath, line) for line in lines
+               if (parts := line.partition(separator))[1]
+               and (url := parts[0].strip()) and (filepath := parts[2].strip())]
+    malformed_count = len(lines) - len(entries)
+    if malformed_count:
+        logger.warning(f"Skipped {malformed_count} malformed log entries (missing url, path or separator).")
+    return len(lines), entries
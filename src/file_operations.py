@@ -1,12 +1,25 @@
 import os
 import re
 import logging
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
+
+_COURSE_ID_RE = re.compile(r'[?&]id=(\d+)')
+_FOLDER_INVALID_RE = re.compile(r'[<>:"/\\|?*]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_logging_setup: Optional[Tuple[logging.Logger, str, str]] = None  # Result of the first setup_logging() call
 
 
 # --- Logging Configuration ---
 def setup_logging():
-    """Sets up logging for the application"""
+    """Sets up logging for the application
+
+    Only the first call configures anything; later calls return the same logger and paths.
+    """
+    global _logging_setup
+    if _logging_setup is not None:
+        return _logging_setup
+
     APP_NAME = "MoodleDown"
     COMPANY_NAME = "MoodleDown"
     log_base_dir = os.getenv('LOCALAPPDATA')
@@ -31,28 +44,40 @@ def setup_logging():
     logger.info(f"Logging initialized. Main log: {log_file_path}")
     logger.info(f"Using central download history log: {CENTRAL_DOWNLOAD_LOG_FILE}")
 
-    return logger, log_file_path, CENTRAL_DOWNLOAD_LOG_FILE
+    _logging_setup = logger, log_file_path, CENTRAL_DOWNLOAD_LOG_FILE
+    return _logging_setup
 
 
+@lru_cache(maxsize=256)
 def sanitize_folder_name(folder_name: str) -> str:
     """Clean folder name by removing invalid characters"""
-    sanitized = re.sub(r'[<>:"/\\|?*]', '_', folder_name).strip().strip('.')
-    sanitized = re.sub(r'\s+', '_', sanitized)
+    sanitized = _FOLDER_INVALID_RE.sub('_', folder_name).strip().strip('.')
+    sanitized = _WHITESPACE_RE.sub('_', sanitized)
     return sanitized if sanitized else "Section"
 
 
+def get_browser_profile_dir(username: str) -> str:
+    """Return the persistent browser profile folder for a Moodle user"""
+    APP_NAME = "MoodleDown"
+    COMPANY_NAME = "MoodleDown"
+    base_dir = os.getenv('LOCALAPPDATA')
+    profiles_dir = os.path.join(base_dir, COMPANY_NAME, APP_NAME, 'BrowserProfiles') if base_dir else os.path.join(
+        os.path.expanduser("~"), f".{APP_NAME.lower()}", 'profiles')
+    return os.path.join(profiles_dir, sanitize_folder_name(username or "default"))
+
+
 def sanitize_filename(filename: str) -> str:
     """Clean filename by removing invalid characters"""
     sanitized = re.sub(r'[<>:"/\\|?*\x00-\x1F]', '_', filename).strip('._ ')
     return sanitized if sanitized else "file"
 
 
-def create_course_folder(course_url: str, base_dir: Optional[str] = None, course_name: Optional[str] = None) -> str:
-    """Create and return folder path for storing course files
-    
+def get_course_folder_path(course_url: str, base_dir: Optional[str] = None, course_name: Optional[str] = None) -> str:
+    """Return the folder path for storing course files without creating it
+
     Args:
         course_url: The course URL (used as fallback if no course name provided)
-        base_dir: Base directory to create folder in
+        base_dir: Base directory the folder belongs in
         course_name: Optional course name to use for folder
     """
     base_dir = base_dir or os.getcwd()
@@ -62,14 +87,25 @@ def create_course_folder(course_url: str, base_dir: Optional[str] = None, course
         folder_name = course_name
     else:
         # Try to extract course ID from URL as fallback
-        match = re.search(r'[?&]id=(\d+)', course_url)
+        match = _COURSE_ID_RE.search(course_url)
         folder_name = f"course_{match.group(1)}" if match else "moodle_course"
 
     # Sanitize folder name
     folder_name = sanitize_folder_name(folder_name)
     folder_name = folder_name if folder_name else "moodle_course"
 
-    folder_path = os.path.join(base_dir, folder_name)
+    return os.path.join(base_dir, folder_name)
+
+
+def create_course_folder(course_url: str, base_dir: Optional[str] = None, course_name: Optional[str] = None) -> str:
+    """Create and return folder path for storing course files
+    
+    Args:
+        course_url: The course URL (used as fallback if no course name provided)
+        base_dir: Base directory to create folder in
+        course_name: Optional course name to use for folder
+    """
+    folder_path = get_course_folder_path(course_url, base_dir, course_name)
     logger = logging.getLogger("MoodleDownPlaywright")
 
     try:
@@ -1,15 +1,20 @@
 import os
 import re
-import getpass
+import time
 import logging
-from typing import Optional, Callable, List, Tuple
+import threading
+from typing import Optional, Callable, List, Set, Tuple
 
 from .moodle_browser import MoodleBrowser
 from .content_extractor import ContentExtractor
-from .download_handler import DownloadHandler
-from .file_operations import create_course_folder, setup_logging
+from .download_handler import DownloadHandler, get_logged_urls_from_file
+from .file_operations import create_course_folder, setup_logging, get_browser_profile_dir
 from .chromium_setup import ensure_chromium_once
 
+_INVALID_TABLE = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
+_COLLAPSE = re.compile(r'[\s_]+')
+_log_verified: Set[str] = set()  # Central log paths already known to be writable
+
 
 def download_course(course_url: str,
                     username: str,
@@ -21,13 +26,22 @@ def download_course(course_url: str,
                     course_name: Optional[str] = None,
                     year_range: str = "2024-25",
                     existing_browser: Optional[MoodleBrowser] = None,
-                    assume_logged_in: bool = False) -> bool:
+                    assume_logged_in: bool = False,
+                    min_interval_s: float = 0.05,
+                    logged_urls: Optional[Set[str]] = None,
+                    log_lock: Optional[threading.Lock] = None,
+                    on_login_verified: Optional[Callable[[], None]] = None) -> bool:
     """Main function to download course content from Moodle.
 
     When ``existing_browser`` is provided, the function reuses the supplied
     Playwright session instead of launching a new browser. Set
     ``assume_logged_in`` to ``True`` if the shared browser already completed
-    authentication.
+    authentication. Progress updates closer together than ``min_interval_s``
+    are dropped, except for the first (0%) and final (100%) ones. Callers downloading
+    several courses in parallel load the central log once and pass the resulting
+    ``logged_urls`` set, together with a ``log_lock`` shared by every download.
+    ``on_login_verified`` is called when the credentials were accepted by an actual
+    login, as opposed to a reused session that never checked them.
     """
 
     browser = existing_browser
@@ -35,18 +49,20 @@ def download_course(course_url: str,
     overall_success = False
     logger, log_file_path, central_download_log_file = setup_logging()
 
-    def update_progress(message: str, percentage: float):
-        """Forward progress updates to the callback if provided"""
-        if progress_callback:
-            progress_callback(message, max(0.0, min(100.0, percentage)))
+    last_progress_time = [0.0]  # Use list for mutable reference
 
-    if browser is None:
-        chromium_ok, chromium_message = ensure_chromium_once()
-        if not chromium_ok:
-            update_progress("Chromium setup failed", 100)
-            logger.error(f"Chromium unavailable: {chromium_message}")
-            return False
-    else:
+    def update_progress(message: str, percentage: float):
+        """Forward progress updates to the callback if provided, at most one per min_interval_s"""
+        if not progress_callback:
+            return
+        percentage = max(0.0, min(100.0, percentage))
+        now = time.monotonic()
+        if 0.0 < percentage < 100.0 and now - last_progress_time[0] < min_interval_s:
+            return
+        last_progress_time[0] = now
+        progress_callback(message, percentage)
+
+    if browser is not None:
         logger.info("Reusing existing MoodleBrowser instance for course download.")
 
     try:
@@ -56,48 +72,76 @@ def download_course(course_url: str,
                                              os.path.basename(download_folder))
         logger.info(f"Target download folder for this course: {course_folder}")
 
-        # Step 2: Verify central log is accessible
-        try:
-            with open(central_download_log_file, 'a', encoding='utf-8'):
-                pass
-            logger.info(f"Central download log file is accessible: {central_download_log_file}")
-        except IOError as e:
-            logger.error(f"Could not create/access central download log: {e}. Proceeding without URL filtering.")
-
-        # Step 3: Set up browser
+        # Step 2: Verify central log is accessible (once per process)
+        if central_download_log_file not in _log_verified:
+            try:
+                with open(central_download_log_file, 'a', encoding='utf-8'):
+                    pass
+                _log_verified.add(central_download_log_file)
+                logger.info(f"Central download log file is accessible: {central_download_log_file}")
+            except IOError as e:
+                logger.error(f"Could not create/access central download log: {e}. Proceeding without URL filtering.")
+
+        # Step 3: Set up browser; saved session cookies let the course be fetched without launching Chromium
+        html_content = ""
+        page_url = course_url
         if browser is None:
-            browser = MoodleBrowser(course_folder, headless, year_range)
-            browser.setup_browser()
+            browser = MoodleBrowser(course_folder, headless, year_range, get_browser_profile_dir(username))
             created_browser = True
+            if browser.setup_http_session():
+                update_progress("Reusing saved session...", 5)
+                html_content = browser.get_page_html_via_api(course_url)
+                if not html_content:
+                    logger.info("Saved session was not accepted, starting the browser.")
+                    browser.close()
+                    browser.discard_session_state()
+            if not html_content:
+                chromium_ok, chromium_message = ensure_chromium_once()
+                if not chromium_ok:
+                    update_progress("Chromium setup failed", 100)
+                    logger.error(f"Chromium unavailable: {chromium_message}")
+                    return False
+                browser.setup_browser()
         else:
             browser.download_folder = course_folder
             browser.year_range = year_range
             browser.BASE_URL = f"https://moodle.huji.ac.il/{year_range}"
 
-        # Step 4: Perform login
-        if assume_logged_in:
-            update_progress("Reusing existing session...", 5)
-        else:
-            update_progress("Logging in...", 5)
-            if not browser.login(username, password):
-                update_progress("Login failed", 100)
-                logger.error("Moodle login failed.")
-                return False
-
-        # Step 5: Navigate to the course
-        update_progress("Navigating to course...", 15)
-        if not browser.navigate_to_course(course_url):
-            update_progress("Course navigation failed", 100)
-            logger.error(f"Failed to navigate to course {course_url}.")
-            return False
-
-        # Step 6: Setup content extractor and download handler
+        if not html_content:
+            # Step 4: Perform login
+            if assume_logged_in:
+                update_progress("Reusing existing session...", 5)
+            elif browser.is_logged_in():
+                update_progress("Reusing saved session...", 5)
+                browser.save_session_state()
+            else:
+                update_progress("Logging in...", 5)
+                if not browser.login(username, password):
+                    update_progress("Login failed", 100)
+                    logger.error("Moodle login failed.")
+                    return False
+                if on_login_verified:
+                    on_login_verified()
+                browser.save_session_state()
+
+            # Step 5: Fetch the course over the logged-in session; the page only navigates as a fallback
+            update_progress("Navigating to course...", 15)
+            html_content = browser.get_page_html_via_api(course_url)
+            if not html_content:
+                if not browser.navigate_to_course(course_url):
+                    update_progress("Course navigation failed", 100)
+                    logger.error(f"Failed to navigate to course {course_url}.")
+                    return False
+                page_url = browser.page.url
+                html_content = browser.get_page_content()
+
+        # Step 6: Setup content extractor; the download handler waits until there is something to download
         update_progress("Analyzing course content...", 25)
-        downloader = DownloadHandler(browser, central_download_log_file)
+        if logged_urls is None:
+            logged_urls = get_logged_urls_from_file(central_download_log_file)
         content_extractor = ContentExtractor(browser.BASE_URL)
 
         # Step 7: Extract download links from page content
-        html_content = browser.get_page_content()
         if not html_content:
             update_progress("Failed to get page content", 100)
             logger.error("Could not retrieve page content.")
@@ -106,8 +150,8 @@ def download_course(course_url: str,
         # Get links and filter against previously downloaded URLs
         links_to_download = content_extractor.get_download_links(
             html_content,
-            browser.page.url if browser.page else browser.BASE_URL,
-            downloader.get_logged_urls()
+            page_url,
+            logged_urls
         )
 
         if not links_to_download:
@@ -117,6 +161,7 @@ def download_course(course_url: str,
 
         # Step 8: Download files
         update_progress(f"Found {len(links_to_download)} new items. Starting download...", 30)
+        downloader = DownloadHandler(browser, central_download_log_file, logged_urls, log_lock)
         successful, _, failed = downloader.download_files(
             links_to_download,
             lambda msg, pct: update_progress(msg, 30 + pct * 0.7),  # Scale progress 30-100%
@@ -170,8 +215,8 @@ if __name__ == "__main__":
 
         # Determine download path
         folder_name = course_name_input if course_name_input else "moodle_course"
-        folder_name = folder_name.replace(r'[<>:"/\\|?*]', '_').strip().strip('. ')
-        folder_name = re.sub(r'[\s_]+', '_', folder_name)
+        folder_name = folder_name.translate(_INVALID_TABLE).strip().strip('. ')
+        folder_name = _COLLAPSE.sub('_', folder_name)
         folder_name = folder_name if folder_name else "moodle_course"
         intended_download_folder_path = os.path.join(base_download_dir, folder_name)
 
@@ -204,17 +249,25 @@ if __name__ == "__main__":
             last_msg[0] = message
 
 
-        # Call the main download function
-        success = download_course(
-            course_url=course_url,
-            username=username,
-            password=password,
-            download_folder=intended_download_folder_path,
-            progress_callback=console_progress,
-            headless=headless_mode,
-            organize_by_section=organize_sections,
-            course_name=course_name_input
-        )
+        chromium_ok, chromium_message = ensure_chromium_once()
+        if not chromium_ok:
+            print(f"Error: Chromium unavailable: {chromium_message}")
+            exit(1)
+
+        # Call the main download function with a browser session that can be reused across courses
+        with MoodleBrowser.session(intended_download_folder_path, headless=headless_mode,
+                                   user_data_dir=get_browser_profile_dir(username)) as browser:
+            success = download_course(
+                course_url=course_url,
+                username=username,
+                password=password,
+                download_folder=intended_download_folder_path,
+                progress_callback=console_progress,
+                headless=headless_mode,
+                organize_by_section=organize_sections,
+                course_name=course_name_input,
+                existing_browser=browser
+            )
 
         print()  # Newline after progress bar
 
@@ -1,5 +1,10 @@
+import os
+import json
+import time
+import random
 import logging
-from typing import Optional
+import contextlib
+from typing import Any, Dict, Iterator, Optional
 from playwright.sync_api import sync_playwright, Playwright, Browser, BrowserContext, Page, APIRequestContext
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError, Error as PlaywrightError
 
@@ -7,10 +12,15 @@ from playwright.sync_api import TimeoutError as PlaywrightTimeoutError, Error as
 class MoodleBrowser:
     """Handles browser session, authentication and navigation for Moodle"""
     BASE_URL = "https://moodle.huji.ac.il/2024-25"
+    COURSE_LIST_ITEM_SELECTOR = "section[data-block='myoverview'] li.course-listitem"
+    SESSION_STATE_SUFFIX = ".session.json"  # Saved cookies, kept next to the persistent profile
 
-    def __init__(self, download_folder: str, headless: bool = False, year_range: str = "2024-25"):
+    def __init__(self, download_folder: str, headless: bool = False, year_range: str = "2024-25",
+                 user_data_dir: Optional[str] = None, storage_state: Optional[Dict[str, Any]] = None):
         self.download_folder = download_folder
         self.headless = headless
+        self.user_data_dir = user_data_dir  # Persistent profile keeping the Moodle session between runs
+        self.storage_state = storage_state  # Cookies of a logged-in browser, see get_storage_state()
         self.year_range = year_range
         self.BASE_URL = f"https://moodle.huji.ac.il/{year_range}"
         self._playwright: Optional[Playwright] = None
@@ -22,27 +32,54 @@ class MoodleBrowser:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"}
         self.logger = logging.getLogger("MoodleDownPlaywright")
 
+    @classmethod
+    @contextlib.contextmanager
+    def session(cls, download_folder: str, headless: bool = True, year_range: str = "2024-25",
+                user_data_dir: Optional[str] = None,
+                storage_state: Optional[Dict[str, Any]] = None) -> Iterator["MoodleBrowser"]:
+        """Set up a browser for the duration of a with-block and close it afterwards
+
+        Pass the yielded browser as ``existing_browser`` to every ``download_course``
+        call to pay the browser start-up cost once.
+        """
+        browser = cls(download_folder, headless, year_range, user_data_dir, storage_state)
+        browser.setup_browser()
+        try:
+            yield browser
+        finally:
+            browser.close()
+
     def setup_browser(self) -> None:
         """Initialize and configure the browser"""
         try:
             self._playwright = sync_playwright().start()
-            try:
-                self.browser = self._playwright.chromium.launch(headless=self.headless)
-                self.logger.info("Launched Chromium browser")
-            except Exception:
-                self.logger.warning("Chromium launch failed, trying system Chrome")
-                self.browser = self._playwright.chromium.launch(channel="chrome", headless=self.headless)
-                self.logger.info("Launched system Chrome browser")
-
-            self.context = self.browser.new_context(user_agent=self.headers["User-Agent"])
-            self.logger.info("Browser context created")
+            if self.user_data_dir:
+                try:
+                    self.context = self._launch_persistent_context()
+                except PlaywrightError as e:
+                    # Typically the profile is locked by another running browser
+                    self.logger.warning(f"Persistent profile unavailable, using a fresh context: {e}")
+
+            if self.context is None:
+                try:
+                    self.browser = self._playwright.chromium.launch(headless=self.headless)
+                    self.logger.info("Launched Chromium browser")
+                except Exception:
+                    self.logger.warning("Chromium launch failed, trying system Chrome")
+                    self.browser = self._playwright.chromium.launch(channel="chrome", headless=self.headless)
+                    self.logger.info("Launched system Chrome browser")
+
+                self.context = self.browser.new_context(user_agent=self.headers["User-Agent"],
+                                                        storage_state=self.storage_state)
+                self.logger.info("Browser context created")
             # Bypass some bot detection
             self.context.add_init_script(
                 "navigator.webdriver = false; Object.defineProperty(navigator, 'webdriver', { get: () => undefined });")
-            self.page = self.context.new_page()
+            self.page = self.context.pages[0] if self.context.pages else self.context.new_page()
             self.logger.info("New page created in context")
             self.page.set_default_timeout(30000)  # 30 seconds
             self.context.set_default_timeout(30000)
+            # Shares the context's cookies, user agent and connection pool, so requests need no per-call headers
             self.api_request_context = self.context.request
             self.logger.info("API Request Context created, linked to browser state.")
             self.logger.info("Playwright browser initialized successfully")
@@ -55,8 +92,108 @@ class MoodleBrowser:
             self.close()
             raise
 
-    def login(self, username: str, password: str) -> bool:
-        """Log in to Moodle with provided credentials"""
+    def _launch_persistent_context(self) -> BrowserContext:
+        """Launch Chromium on the persistent profile, falling back to system Chrome"""
+        os.makedirs(self.user_data_dir, exist_ok=True)
+        launch_persistent = self._playwright.chromium.launch_persistent_context
+        try:
+            context = launch_persistent(self.user_data_dir, headless=self.headless,
+                                        user_agent=self.headers["User-Agent"])
+            self.logger.info(f"Launched Chromium with persistent profile: {self.user_data_dir}")
+        except PlaywrightError:
+            self.logger.warning("Chromium launch failed, trying system Chrome")
+            context = launch_persistent(self.user_data_dir, channel="chrome", headless=self.headless,
+                                        user_agent=self.headers["User-Agent"])
+            self.logger.info(f"Launched system Chrome with persistent profile: {self.user_data_dir}")
+        return context
+
+    @property
+    def session_state_file(self) -> Optional[str]:
+        """Path of the saved session cookies for this profile, if a profile is used"""
+        return self.user_data_dir + self.SESSION_STATE_SUFFIX if self.user_data_dir else None
+
+    def save_session_state(self) -> None:
+        """Save the session cookies so later runs can use setup_http_session()
+
+        The file holds live session cookies, so it is created readable by the owner only
+        and swapped in whole.
+        """
+        state_file = self.session_state_file
+        if not self.context or not state_file:
+            return
+        tmp_file = state_file + ".tmp"
+        try:
+            state = self.context.storage_state()
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_file, state_file)
+            self.logger.info(f"Session state saved to {state_file}")
+        except (PlaywrightError, OSError) as e:
+            self.logger.warning(f"Could not save session state: {e}")
+
+    def discard_session_state(self) -> None:
+        """Delete the saved session cookies, e.g. once Moodle no longer accepts them"""
+        if self.session_state_file:
+            try:
+                os.remove(self.session_state_file)
+                self.logger.info("Discarded expired session state.")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.warning(f"Could not remove session state: {e}")
+
+    def setup_http_session(self) -> bool:
+        """Set up only an API request context from the saved session cookies
+
+        No browser is launched, so page-based methods are unavailable; the caller should
+        fall back to setup_browser() when Moodle no longer accepts the session.
+        Returns False when there is no saved session to use.
+        """
+        state_file = self.session_state_file
+        if not state_file or not os.path.exists(state_file):
+            return False
+        try:
+            self._playwright = sync_playwright().start()
+            self.api_request_context = self._playwright.request.new_context(
+                user_agent=self.headers["User-Agent"], storage_state=state_file)
+            self.logger.info("API Request Context created from saved session, no browser launched.")
+            return True
+        except PlaywrightError as e:
+            self.logger.warning(f"Could not use saved session state: {e}")
+            self.close()
+            return False
+
+    def get_storage_state(self) -> Dict[str, Any]:
+        """Return the session cookies as plain data
+
+        Playwright objects must stay on the thread that created them; this snapshot can be
+        handed to browsers set up on other threads to reuse the login.
+        """
+        return self.context.storage_state() if self.context else {}
+
+    def is_logged_in(self) -> bool:
+        """Check whether the browser session is already authenticated
+
+        Opens the dashboard; Moodle redirects to the login page when there is no session.
+        """
+        if not self.page:
+            return False
+        try:
+            self.page.goto(f"{self.BASE_URL}/my/", wait_until='domcontentloaded', timeout=20000)
+        except PlaywrightError as e:
+            self.logger.warning(f"Could not check existing session: {e}")
+            return False
+        logged_in = "/my/" in self.page.url
+        self.logger.info("Existing Moodle session found." if logged_in else "No existing Moodle session.")
+        return logged_in
+
+    def login(self, username: str, password: str, human_mode: bool = False) -> bool:
+        """Log in to Moodle with provided credentials
+
+        With ``human_mode`` the form is filled with randomized pauses, hovers and
+        per-character typing; otherwise fields are filled directly.
+        """
         if not self.page or not self.context:
             self.logger.error("Browser not set up correctly. Call setup_browser() first.")
             return False
@@ -65,30 +202,34 @@ class MoodleBrowser:
         dashboard_url_pattern = f"{self.BASE_URL}/my/*"
 
         try:
-            import random
-            import time
+            def pause(low: float, high: float):
+                if human_mode:
+                    time.sleep(random.uniform(low, high))
 
-            # Random delay before navigating to login page (1-3 seconds)
-            time.sleep(random.uniform(0.2, 0.35))
-            self.logger.info(f"Navigating to login page: {login_url}")
-            self.page.goto(login_url)
+            def click(selector: str):
+                if human_mode:  # Move mouse to the element with human-like motion before clicking
+                    self.page.locator(selector).hover()
+                    pause(0.3, 0.8)
+                self.page.locator(selector).click()
 
-            # Wait for a random time as a human would do while the page loads
-            time.sleep(random.uniform(0.21, 0.32))
+            if self.page.url.startswith(login_url):
+                # Already there, e.g. after is_logged_in() was redirected to the login page
+                self.logger.info("Login page already loaded.")
+            else:
+                pause(0.2, 0.35)
+                self.logger.info(f"Navigating to login page: {login_url}")
+                self.page.goto(login_url)
+                pause(0.21, 0.32)
 
-            # Click email login tab with human-like delay and randomized timing
+            # Click email login tab
             self.logger.info("Attempting to click email login tab")
             email_tab_selector = "a[href='#pills-email']"
-            self.page.locator(email_tab_selector).wait_for(state="visible", timeout=10000)
-
-            # Move mouse to tab with human-like motion before clicking
-            self.page.locator(email_tab_selector).hover()
-            time.sleep(random.uniform(0.3, 0.8))
-            self.page.locator(email_tab_selector).click()
+            # The login page is server-rendered, so one wait covers the whole form;
+            # the click/fill calls below auto-wait for their element to be actionable
+            self.page.wait_for_selector(email_tab_selector, state="visible", timeout=10000)
+            click(email_tab_selector)
             self.logger.info("Clicked email login tab.")
-
-            # Slight delay after clicking tab (as a human would wait for UI to update)
-            time.sleep(random.uniform(0.5, 1.2))
+            pause(0.5, 1.2)
 
             # Form selectors
             email_form_selector = "form#f3"
@@ -96,45 +237,34 @@ class MoodleBrowser:
             password_selector = f"{email_form_selector} #password"
             submit_button_selector = f"{email_form_selector} button.btn.btn-primary.g-recaptcha"
 
-            self.page.locator(email_form_selector).wait_for(state="visible", timeout=10000)
-            self.logger.info("Login form visible.")
-
-            # Fill username with human-like typing speed (not too fast)
-            self.page.locator(username_selector).wait_for(state="visible")
-            self.page.locator(username_selector).click()
-            for char in username:
-                self.page.locator(username_selector).type(char, delay=random.uniform(80, 150))
-                time.sleep(random.uniform(0.02, 0.08))
-
-            # Small pause between username and password (as a human would do)
-            time.sleep(random.uniform(0.4, 1.0))
-
-            # Focus on password field before typing (human behavior)
-            self.page.locator(password_selector).wait_for(state="visible")
-            self.page.locator(password_selector).click()
+            if human_mode:
+                self.page.locator(username_selector).click()
+                for char in username:
+                    self.page.locator(username_selector).type(char, delay=random.uniform(80, 150))
+                    time.sleep(random.uniform(0.02, 0.08))
+            else:
+                self.page.locator(username_selector).fill(username)
+            pause(0.4, 1.0)
 
-            # Type password with variable speed (some keys faster than others)
-            for char in password:
-                # Type a bit faster on letters, slower on symbols/numbers (human behavior)
-                delay = random.uniform(60, 130) if char.isalpha() else random.uniform(90, 160)
-                self.page.locator(password_selector).type(char, delay=delay)
-                time.sleep(random.uniform(0.01, 0.05))
+            if human_mode:
+                self.page.locator(password_selector).click()
+                for char in password:
+                    # Type a bit faster on letters, slower on symbols/numbers
+                    delay = random.uniform(60, 130) if char.isalpha() else random.uniform(90, 160)
+                    self.page.locator(password_selector).type(char, delay=delay)
+                    time.sleep(random.uniform(0.01, 0.05))
+            else:
+                self.page.locator(password_selector).fill(password)
 
             self.logger.info(f"Entered credentials for user: {username}")
+            pause(0.7, 1.8)
 
-            # Short pause before clicking submit (decision time for a human)
-            time.sleep(random.uniform(0.7, 1.8))
-
-            # Hover over submit button before clicking (human behavior)
             self.page.locator(submit_button_selector).wait_for(state="visible")
-            self.page.locator(submit_button_selector).hover()
-            time.sleep(random.uniform(0.2, 0.6))
-            self.page.locator(submit_button_selector).click()
+            click(submit_button_selector)
             self.logger.info("Login form submitted.")
 
             # Verify login success
             try:
-                # Increase timeout a bit since we're mimicking human behavior
                 self.page.wait_for_url(dashboard_url_pattern, timeout=25000)
                 self.logger.info("Login successful: Navigated to dashboard.")
                 return True
@@ -180,18 +310,17 @@ class MoodleBrowser:
             # Direct Navigation to the provided course URL
             self.logger.info(f"Navigating to course: {course_url}")
             try:
-                self.page.goto(course_url, wait_until='networkidle', timeout=20000)
-                
+                # Return once the response starts; the wait below is the real readiness signal
+                self.page.goto(course_url, wait_until='commit', timeout=20000)
+                try:
+                    self.page.wait_for_selector("h1, .course-content", state='visible', timeout=15000)
+                except PlaywrightTimeoutError:
+                    self.logger.warning("Course title/content element not found quickly.")
+
                 # Verify we're on a course page
                 if "/course/view.php" in self.page.url:
                     self.logger.info("Successfully navigated to course page.")
-                    course_title_selector = "h1"  # Often the course name is in H1
-                    if self.page.locator(course_title_selector).first.is_visible(timeout=5000):
-                        self.logger.info("Course title element found, navigation confirmed.")
-                        return True
-                    else:
-                        self.logger.warning("Navigation seemed successful, but course title element not found quickly.")
-                        return True  # Still consider success if we're on course page
+                    return True
                 else:
                     self.logger.warning(f"Navigation resulted in unexpected page: {self.page.url}")
                     return False
@@ -212,11 +341,33 @@ class MoodleBrowser:
             self.logger.error("Page not available.")
             return ""
         try:
+            self.page.wait_for_load_state('domcontentloaded')  # Navigations may return before the DOM is complete
             return self.page.content()
         except PlaywrightError as e:
             self.logger.error(f"Failed to get page content: {e}")
             return ""
 
+    def get_page_html_via_api(self, url: str) -> str:
+        """Fetch a page's server HTML through the API request context
+
+        Shares the browser's cookies and skips serializing the live DOM. Returns an
+        empty string when the request fails or Moodle redirects to the login page.
+        """
+        if not self.api_request_context:
+            return ""
+        try:
+            response = self.api_request_context.get(url, timeout=20000)
+            try:
+                if not response.ok or "/login/" in response.url:
+                    self.logger.warning(f"API fetch of {url} returned {response.status} at {response.url}")
+                    return ""
+                return response.text()
+            finally:
+                response.dispose()
+        except PlaywrightError as e:
+            self.logger.warning(f"API fetch of {url} failed: {e}")
+            return ""
+
     def navigate_to_dashboard(self) -> bool:
         """Navigate to the Moodle dashboard page after login"""
         if not self.page:
@@ -227,11 +378,12 @@ class MoodleBrowser:
         
         try:
             self.logger.info(f"Navigating to dashboard: {dashboard_url}")
-            self.page.goto(dashboard_url, wait_until='networkidle', timeout=20000)
+            self.page.goto(dashboard_url, wait_until='domcontentloaded', timeout=20000)
             
             # Verify we're on the dashboard
             if "/my/" in self.page.url:
                 self.logger.info("Successfully navigated to dashboard.")
+                self.wait_for_course_list()
                 return True
             else:
                 self.logger.warning(f"Navigation resulted in unexpected page: {self.page.url}")
@@ -240,9 +392,21 @@ class MoodleBrowser:
             self.logger.error(f"Failed to navigate to dashboard: {e}")
             return False
 
+    def wait_for_course_list(self) -> None:
+        """Wait for the dashboard's course overview block, which renders its list after the DOM is ready"""
+        try:
+            self.page.locator(self.COURSE_LIST_ITEM_SELECTOR).first.wait_for(state='attached', timeout=10000)
+        except PlaywrightTimeoutError:
+            self.logger.warning("Course overview list did not render; the dashboard may have no courses.")
+
     def close(self) -> None:
         """Close browser and clean up resources"""
         self.logger.info("Closing Playwright browser and resources...")
+        if self.api_request_context and not self.context:
+            try:  # Standalone context from setup_http_session(); browser contexts own theirs
+                self.api_request_context.dispose()
+            except Exception as e:
+                self.logger.warning(f"Error disposing API request context: {e}")
         for resource, name in [(self.context, "context"), (self.browser, "browser"), (self._playwright, "Playwright")]:
             if resource:
                 try:
@@ -4,22 +4,29 @@ Handles user authentication, course selection, and download management.
 """
 
 import sys
+import json
+import queue
 import threading
 import os
+import logging
 import re
+from abc import ABCMeta, abstractmethod
 import time  # Added for unzip timing
-import zipfile  # Added for selective unzip
 from typing import Optional, Tuple, List, Dict, Set, Any, Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 # Playwright imports are handled inside chromium_setup when needed
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QPushButton, QFileDialog, QProgressBar, QListWidget, QListWidgetItem, QAbstractItemView,
     QMessageBox, QMainWindow, QStatusBar, QDialog, QDialogButtonBox, QFormLayout, QCheckBox,
     QSplitter, QComboBox)
 from PyQt5.QtGui import QFont, QIcon, QMouseEvent
-from PyQt5.QtCore import Qt, pyqtSignal, QObject, QSize, QSettings, QPoint, QEvent
+from PyQt5.QtCore import (Qt, pyqtSignal, QObject, QSize, QSettings, QPoint, QEvent, QRunnable, QThread,
+    QThreadPool, QTimer)
 
 from .chromium_setup import chromium_ready, ensure_chromium
 
+log = logging.getLogger(__name__)
+
 # --- Dark Theme Import ---
 try:
     import qdarkstyle
@@ -31,9 +38,10 @@ except ImportError:
 # --- Core Module Imports ---
 try:
     from .main import download_course
-    from .file_operations import create_course_folder, setup_logging
+    from .download_handler import get_logged_urls_from_file
+    from .file_operations import get_course_folder_path, setup_logging, get_browser_profile_dir
 except ImportError as e:
-    print("ERROR: Could not import core modules.")
+    log.error("Could not import core modules: %s", e)
     try:
         app_temp = QApplication.instance() or QApplication(sys.argv)
         QMessageBox.critical(None, "Fatal Error", 
@@ -47,6 +55,7 @@ except ImportError as e:
 # --- Optional Imports ---
 try:
     import keyring
+    import keyring.errors
     KEYRING_AVAILABLE = True
 except ImportError:
     keyring = None
@@ -71,11 +80,21 @@ else:
     unzipper = None
     UNZIPPER_AVAILABLE = False
 
-def ensure_chromium_available(parent: QWidget) -> bool:
+class ChromiumProbe(threading.Thread):
+    """Runs the Chromium launch check in the background while the window is built."""
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.result = False
+
+    def run(self):
+        self.result = chromium_ready()
+
+def ensure_chromium_available(parent: QWidget, already_ready: Optional[bool] = None) -> bool:
     """
     Ensure Playwright Chromium browser is installed, prompting the user if needed.
+    Pass ``already_ready`` to reuse the result of an earlier probe.
     """
-    if chromium_ready():
+    if already_ready if already_ready is not None else chromium_ready():
         return True
 
     reply = QMessageBox.question(parent, "Chromium Required",
@@ -99,13 +118,37 @@ def ensure_chromium_available(parent: QWidget) -> bool:
     QMessageBox.information(parent, "Installation Complete", "Chromium is now installed and ready.")
     return True
 
+def _persist_credentials(username: str, password: str, save: bool) -> None:
+    """Store or forget the password in the system keyring."""
+    try:
+        if save:
+            keyring.set_password("MoodleDownApp", username, password)
+        else:
+            keyring.delete_password("MoodleDownApp", username)
+    except (keyring.errors.KeyringError, RuntimeError) as e:
+        log.debug("Keyring update failed: %s", e)
+
+def read_settings(settings: QSettings) -> Dict[str, Any]:
+    """Read all persisted settings in one pass."""
+    return {
+        "username": settings.value("username", ""),
+        "default_location": settings.value("default_location", os.getcwd()),
+        "year_range": settings.value("year_range", "2025-26"),
+        "save_password": settings.value("save_password", False, bool),
+        "headless": settings.value("headless", True, bool),
+        "full_download": settings.value("full_download", False, bool),
+        "unzip_after": settings.value("unzip_after", True, bool),
+        # Each lane throttles on its own, so more than one multiplies the request rate to Moodle
+        "max_parallel_courses": settings.value("max_parallel_courses", 1, int),
+    }
+
 # --- Helper function to validate course URL ---
+_COURSE_URL_RE = re.compile(r'/course/view\.php')
+
 def is_valid_course_url(url: str) -> bool:
     """Check if URL is a valid Moodle course URL."""
-    if not url:
-        return False
     # Check if it's a course URL - look for course/view.php pattern
-    return bool(re.search(r'/course/view\.php', url))
+    return bool(url) and _COURSE_URL_RE.search(url) is not None
 
 # --- Default Courses ---
 COURSES: Dict[str, str] = {
@@ -118,15 +161,67 @@ class WorkerSignals(QObject):
     status = pyqtSignal(str)
     progress = pyqtSignal(float)
     finished = pyqtSignal(bool, str)
+    credentials_verified = pyqtSignal()  # A real login accepted the password, not just a saved session
 
 class AutofillSignals(QObject):
     status = pyqtSignal(str)
     finished = pyqtSignal(bool, str, list)  # success, message, courses_list
 
+# --- Pooled Worker Base ---
+class _PooledWorkerMeta(type(QRunnable), ABCMeta):
+    """Lets a QRunnable subclass declare abstract methods."""
+
+class PooledWorker(QRunnable, metaclass=_PooledWorkerMeta):
+    """QRunnable executed on the global QThreadPool; subclasses implement work()."""
+    def __init__(self):
+        super().__init__()
+        self._alive = False
+
+    def start(self):
+        self._alive = True  # Set before queueing so is_alive() holds until the pool picks it up
+        QThreadPool.globalInstance().start(self)
+
+    def is_alive(self) -> bool:
+        return self._alive
+
+    def run(self):
+        self._alive = True
+        try:
+            self.work()
+        finally:
+            self._alive = False
+
+    @abstractmethod
+    def work(self):
+        """Do the job on a pool thread."""
+
+# --- Keyring Worker ---
+class CredentialsWorker(PooledWorker):
+    """Stores or forgets the saved password off the UI thread; keychain backends can be slow."""
+    _lock = threading.Lock()
+    _issued = 0  # Sequence number of the most recently created update (UI thread only)
+    _applied = 0  # Sequence number of the most recently applied update
+
+    def __init__(self, username: str, password: str, save: bool):
+        super().__init__()
+        self.username = username
+        self.password = password
+        self.save = save
+        CredentialsWorker._issued += 1
+        self.sequence = CredentialsWorker._issued
+
+    def work(self):
+        # The pool may run updates out of order; one that was overtaken by a newer update is dropped
+        with CredentialsWorker._lock:
+            if self.sequence < CredentialsWorker._applied:
+                return
+            CredentialsWorker._applied = self.sequence
+            _persist_credentials(self.username, self.password, self.save)
+
 # --- Auto-fill Worker ---
-class AutofillWorker(threading.Thread):
+class AutofillWorker(PooledWorker):
     def __init__(self, username: str, password: str, year_range: str, download_folder: str, headless: bool):
-        super().__init__(daemon=True)
+        super().__init__()
         self.username = username
         self.password = password
         self.year_range = year_range
@@ -134,7 +229,7 @@ class AutofillWorker(threading.Thread):
         self.headless = headless
         self.signals = AutofillSignals()
     
-    def run(self):
+    def work(self):
         try:
             from .moodle_browser import MoodleBrowser
             from .course_extractor import extract_courses
@@ -144,20 +239,24 @@ class AutofillWorker(threading.Thread):
             browser = MoodleBrowser(
                 download_folder=self.download_folder, 
                 year_range=self.year_range, 
-                headless=self.headless
+                headless=self.headless,
+                user_data_dir=get_browser_profile_dir(self.username)
             )
             browser.setup_browser()
             
             # Login
             self.signals.status.emit("Logging in to Moodle...")
-            if not browser.login(self.username, self.password):
+            if not browser.is_logged_in() and not browser.login(self.username, self.password):
                 self.signals.finished.emit(False, "Failed to log in to Moodle. Please check your credentials.", [])
                 browser.close()
                 return
+            browser.save_session_state()  # Lets the following downloads skip the browser
             
-            # Navigate to dashboard
+            # Both the session check and login end on the dashboard; navigate only if they did not
             self.signals.status.emit("Navigating to dashboard...")
-            if not browser.navigate_to_dashboard():
+            if "/my/" in browser.page.url:
+                browser.wait_for_course_list()
+            elif not browser.navigate_to_dashboard():
                 self.signals.finished.emit(False, "Failed to navigate to dashboard.", [])
                 browser.close()
                 return
@@ -179,27 +278,34 @@ class AutofillWorker(threading.Thread):
             self.signals.finished.emit(False, f"An error occurred: {str(e)}", [])
 
 # --- Base Download Worker ---
-class DownloadWorkerBase(threading.Thread):
-    def __init__(self, username: str, password: str, download_folder: str, settings: Optional[QSettings] = None):
-        super().__init__(daemon=True)
+class DownloadWorkerBase(PooledWorker):
+    def __init__(self, username: str, password: str, download_folder: str, config: Optional[Dict[str, Any]] = None):
+        super().__init__()
         self.username = username
         self.password = password
         self.download_folder = download_folder
-        self.settings = settings or QSettings("MoodleDown", "MoodleDownApp")
+        # Settings snapshot from the window; read QSettings only when constructed standalone
+        self.config = config if config is not None else read_settings(QSettings("MoodleDown", "MoodleDownApp"))
         self.signals = WorkerSignals()
         
         # Read settings
-        self.headless = self.settings.value("headless", True, bool)
+        self.headless = self.config["headless"]
         self.organize_by_section = True  # Always True
-        self.full_download = self.settings.value("full_download", False, bool)
-        self.year_range = self.settings.value("year_range", "2025-26")
+        self.full_download = self.config["full_download"]
+        self.year_range = self.config["year_range"]
     
-    def _download_single_course(self, course_url: str, course_name: str, progress_callback: Callable[[str, float], None], shared_browser=None) -> bool:
-        if not is_valid_course_url(course_url):
-            progress_callback(f"Invalid URL for {course_name}, skipping.", 0)
-            return False
-            
-        course_folder = create_course_folder(course_url, self.download_folder, course_name)
+    def _prepare_courses(self, courses: List[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+        """Drop invalid course URLs and resolve the folders of the rest, before any browser starts."""
+        prepared = []
+        for course_url, course_name in courses:
+            if not is_valid_course_url(course_url):
+                self.signals.status.emit(f"Invalid URL for {course_name}, skipping.")
+                continue
+            prepared.append((course_url, course_name, get_course_folder_path(course_url, self.download_folder, course_name)))
+        return prepared
+
+    def _download_single_course(self, course_url: str, course_name: str, course_folder: str, progress_callback: Callable[[str, float], None], shared_browser=None,
+                                logged_urls: Optional[Set[str]] = None, log_lock: Optional[threading.Lock] = None) -> bool:
         return download_course(
             course_url=course_url, 
             username=self.username, 
@@ -211,23 +317,30 @@ class DownloadWorkerBase(threading.Thread):
             course_name=course_name,
             year_range=self.year_range,
             existing_browser=shared_browser,
-            assume_logged_in=shared_browser is not None
+            assume_logged_in=shared_browser is not None,
+            logged_urls=logged_urls,
+            log_lock=log_lock,
+            on_login_verified=self.signals.credentials_verified.emit
         )
 
 # --- Single Course Download Worker ---
 class DownloadWorker(DownloadWorkerBase):
-    def __init__(self, course_url: str, course_name: str, username: str, password: str, download_folder: str, settings: Optional[QSettings] = None):
-        super().__init__(username, password, download_folder, settings)
+    def __init__(self, course_url: str, course_name: str, username: str, password: str, download_folder: str, config: Optional[Dict[str, Any]] = None):
+        super().__init__(username, password, download_folder, config)
         self.course_url = course_url
         self.course_name = course_name
 
-    def run(self):
+    def work(self):
         try:
             def progress_callback(message: str, percent: float):
                 self.signals.status.emit(f"{self.course_name}: {message}")
                 self.signals.progress.emit(percent)
             
-            success = self._download_single_course(self.course_url, self.course_name, progress_callback)
+            prepared = self._prepare_courses([(self.course_url, self.course_name)])
+            if not prepared:
+                self.signals.finished.emit(False, f"Invalid URL for {self.course_name}")
+                return
+            success = self._download_single_course(*prepared[0], progress_callback)
             msg = f"{'Successfully downloaded' if success else 'Failed to complete download for'} {self.course_name}"
             self.signals.finished.emit(success, msg)
         except Exception as e:
@@ -236,36 +349,93 @@ class DownloadWorker(DownloadWorkerBase):
 
 # --- Batch Download Worker ---
 class BatchDownloadWorker(DownloadWorkerBase):
-    def __init__(self, courses: List[Tuple[str, str]], username: str, password: str, download_folder: str, settings: Optional[QSettings] = None):
-        super().__init__(username, password, download_folder, settings)
+    MIN_EMIT_INTERVAL = 0.033  # Seconds between progress signals, ~30 per second across all courses
+
+    def __init__(self, courses: List[Tuple[str, str]], username: str, password: str, download_folder: str, config: Optional[Dict[str, Any]] = None):
+        super().__init__(username, password, download_folder, config)
         self.courses = courses
+        self.max_parallel = self.config["max_parallel_courses"]
 
-    def run(self):
+    def work(self):
         total_courses = len(self.courses)
-        successful_courses = 0
-        
+        prepared = self._prepare_courses(self.courses)
+        if not prepared:
+            self.signals.finished.emit(False, "No valid course URLs.")
+            return
+        valid_courses = len(prepared)
+        max_parallel = max(1, min(self.max_parallel, valid_courses))
+        pending: "queue.Queue[Tuple[int, Tuple[str, str, str]]]" = queue.Queue()
+        for item in enumerate(prepared):
+            pending.put(item)
+        course_progress: Dict[int, float] = {}
+        progress_lock = threading.Lock()
+        # Lanes share one verified load of the central log and serialize their appends to it
+        _, _, central_download_log_file = setup_logging()
+        logged_urls = get_logged_urls_from_file(central_download_log_file)
+        log_lock = threading.Lock()
+        last_emit = [0.0]  # Use list for mutable reference
+
+        def make_progress_callback(i: int, course_name: str) -> Callable[[str, float], None]:
+            def progress_callback(message: str, percent: float):
+                with progress_lock:
+                    course_progress[i] = percent
+                    overall_progress = sum(course_progress.values()) / valid_courses
+                    now = time.monotonic()
+                    if percent < 100 and now - last_emit[0] < self.MIN_EMIT_INTERVAL:
+                        return  # Dropped; a later update carries the newer totals
+                    last_emit[0] = now
+                self.signals.status.emit(f"[{i+1}/{valid_courses}] {course_name}: {message}")
+                self.signals.progress.emit(overall_progress)
+            return progress_callback
+
+        def download_pending(browser) -> int:
+            """Download queued courses with one browser until the queue is empty"""
+            downloaded = 0
+            while True:
+                try:
+                    i, (course_url, course_name, course_folder) = pending.get_nowait()
+                except queue.Empty:
+                    return downloaded
+                self.signals.status.emit(f"[{i+1}/{valid_courses}] Starting: {course_name}")
+                if self._download_single_course(course_url, course_name, course_folder,
+                                                make_progress_callback(i, course_name), browser,
+                                                logged_urls, log_lock):
+                    downloaded += 1
+
+        def download_pending_in_own_browser(storage_state: Dict[str, Any]) -> int:
+            # Playwright objects are bound to their thread, so every extra thread gets its own browser
+            with MoodleBrowser.session(self.download_folder, self.headless, self.year_range,
+                                       storage_state=storage_state) as lane_browser:
+                return download_pending(lane_browser)
+
         try:
             from .moodle_browser import MoodleBrowser
-            browser = MoodleBrowser(download_folder=self.download_folder, year_range=self.year_range, headless=self.headless)
-            browser.setup_browser()
-            
-            self.signals.status.emit("Logging in to Moodle...")
-            if not browser.login(self.username, self.password):
-                self.signals.finished.emit(False, "Failed to login to Moodle")
-                return
-                
-            for i, (course_url, course_name) in enumerate(self.courses):
-                self.signals.status.emit(f"[{i+1}/{total_courses}] Starting: {course_name}")
-                course_progress_base = (i / total_courses) * 100
-                course_progress_weight = 100 / total_courses
-
-                def progress_callback(message: str, percent: float):
-                    self.signals.status.emit(f"[{i+1}/{total_courses}] {course_name}: {message}")
-                    overall_progress = course_progress_base + (percent / 100) * course_progress_weight
-                    self.signals.progress.emit(overall_progress)
-                    
-                if self._download_single_course(course_url, course_name, progress_callback, browser):
-                    successful_courses += 1
+            with MoodleBrowser.session(self.download_folder, self.headless, self.year_range,
+                                       user_data_dir=get_browser_profile_dir(self.username)) as browser:
+                self.signals.status.emit("Logging in to Moodle...")
+                if not browser.is_logged_in():
+                    if not browser.login(self.username, self.password):
+                        self.signals.finished.emit(False, "Failed to login to Moodle")
+                        return
+                    self.signals.credentials_verified.emit()
+                browser.save_session_state()
+
+                futures = []
+                executor = ThreadPoolExecutor(max_workers=max_parallel - 1) if max_parallel > 1 else None
+                try:
+                    if executor:
+                        storage_state = browser.get_storage_state()
+                        futures = [executor.submit(download_pending_in_own_browser, storage_state)
+                                   for _ in range(max_parallel - 1)]
+                    successful_courses = download_pending(browser)
+                    for future in as_completed(futures):
+                        try:
+                            successful_courses += future.result()
+                        except Exception as e:
+                            log.warning("Parallel course download browser failed: %s", e)
+                finally:
+                    if executor:
+                        executor.shutdown()
 
             self.signals.progress.emit(100)
             if successful_courses == total_courses:
@@ -274,11 +444,64 @@ class BatchDownloadWorker(DownloadWorkerBase):
                 self.signals.finished.emit(successful_courses > 0, f"Downloaded {successful_courses}/{total_courses} courses")
         except Exception as e:
             self.signals.finished.emit(False, f"Error during batch download: {str(e)}")
-        finally:
-            try:
-                browser.close()
-            except:
-                pass
+
+# --- Selective Unzip Worker ---
+class UnzipWorker(PooledWorker):
+    STATUS_INTERVAL = 0.1  # Seconds between status signals while archives complete
+
+    def __init__(self, target_folders: List[str], cutoff: float):
+        super().__init__()
+        self.target_folders = target_folders
+        self.cutoff = cutoff
+        self.signals = WorkerSignals()
+
+    def work(self):
+        try:
+            folder_of: Dict[str, str] = {}
+            new_zips = []
+            for folder in self.target_folders:
+                for path, st in unzipper.iter_zip_entries(folder):
+                    if st.st_mtime >= self.cutoff:
+                        folder_of[path] = folder
+                        new_zips.append((path, st))
+            processed = len(new_zips)
+            extracted = 0
+            skipped = 0  # Unchanged since an earlier extraction
+            errors = 0
+            last_status = 0.0
+
+            def extract_group(group) -> List[Tuple[str, Optional[bool]]]:
+                # Archives sharing a directory may hold the same member paths, so they run one after another
+                results = []
+                for path, _ in group:
+                    try:
+                        results.append((path, unzipper.extract_zip(path, os.path.dirname(path))))
+                    except Exception:
+                        results.append((path, None))
+                return results
+
+            if new_zips:
+                # Inflating and writing release the GIL, so separate directories extract in parallel
+                groups = unzipper.group_by_directory(new_zips)
+                with ThreadPoolExecutor(max_workers=min(unzipper.DEFAULT_MAX_WORKERS, len(groups))) as executor:
+                    for future in as_completed([executor.submit(extract_group, group) for group in groups]):
+                        for path, result in future.result():
+                            if result is None:
+                                errors += 1
+                            elif result:
+                                extracted += 1
+                                # Optionally delete after extraction (disabled)
+                                # os.remove(path)
+                                now = time.monotonic()
+                                if now - last_status >= self.STATUS_INTERVAL:
+                                    last_status = now
+                                    self.signals.status.emit(f"Unzipped: {os.path.relpath(path, folder_of[path])}")
+                            else:
+                                skipped += 1
+            summary = f"Selective unzip done. New archives: {processed}, Extracted: {extracted}, Already extracted: {skipped}, Errors: {errors}"
+            self.signals.finished.emit(not errors, summary)
+        except Exception as e:
+            self.signals.finished.emit(False, f"Selective unzip failed: {e}")
 
 # --- Add Course Dialog ---
 class AddCourseDialog(QDialog):
@@ -315,28 +538,48 @@ class AddCourseDialog(QDialog):
 
 # --- Main Application Window ---
 class MoodleDownloaderApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, chromium_probe: Optional[ChromiumProbe] = None):
         super().__init__()
         self.setWindowTitle("MoodleDown - Playwright Edition")
         self.resize(600, 500) 
         self.settings = QSettings("MoodleDown", "MoodleDownApp")
         self.settings.setValue("organize_by_section", True)  # Force always True
+        self._cfg = self._load_settings()
         
         self.selected_courses = set()
         self.all_courses = {}
+        self._valid_course_urls = set()  # Rebuilt by refresh_course_list
+        self._items: Tuple[QListWidgetItem, ...] = ()  # Course list items, in list order
+        self._course_folder_cache: Dict[Tuple[str, str], str] = {}  # (url, name) -> folder under the location
         self.current_worker = None
         self.autofill_worker = None
+        self.unzip_worker = None
+        self._unverified_credentials: Optional[Tuple[str, str]] = None  # (username, password) awaiting a real login
+        self._pending_status: Optional[str] = None  # Latest message waiting for _apply_status
         self.download_start_time: float = 0.0  # Track download start for selective unzip
         
         self.browser_ready = False
         self.setup_ui()
         self.load_data()
         # Attempt ensuring browser availability *after* widgets exist so dialogs have a parent
-        self.browser_ready = ensure_chromium_available(self)
+        probe_result = None
+        if chromium_probe is not None:
+            chromium_probe.join()
+            probe_result = chromium_probe.result
+        self.browser_ready = ensure_chromium_available(self, probe_result)
         if not self.browser_ready:
             self.status_label.setText("Browser missing. Click 'Start Download' after installing.")
         self.update_selection()
 
+    def _load_settings(self) -> Dict[str, Any]:
+        """Read persisted settings once; the UI and workers read from this cache afterwards."""
+        return read_settings(self.settings)
+
+    def _save_setting(self, key: str, value: Any) -> None:
+        """Write a setting through to both the in-memory cache and QSettings."""
+        self._cfg[key] = value
+        self.settings.setValue(key, value)
+
     def setup_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -351,7 +594,7 @@ class MoodleDownloaderApp(QMainWindow):
         
         # Credentials
         left_layout.addWidget(QLabel("Credentials:"))
-        self.username_input = QLineEdit(self.settings.value("username", ""))
+        self.username_input = QLineEdit(self._cfg["username"])
         self.username_input.setPlaceholderText("Username / Email")
         self.password_input = QLineEdit()
         self.password_input.setPlaceholderText("Password")
@@ -361,14 +604,15 @@ class MoodleDownloaderApp(QMainWindow):
         
         # Save password checkbox
         self.save_password_cb = QCheckBox("Save password")
-        self.save_password_cb.setChecked(self.settings.value("save_password", False, bool))
+        self.save_password_cb.setChecked(self._cfg["save_password"])
         self.save_password_cb.setEnabled(KEYRING_AVAILABLE)
         left_layout.addWidget(self.save_password_cb)
         
         # Download location
         left_layout.addWidget(QLabel("Download Location:"))
         location_layout = QHBoxLayout()
-        self.location_input = QLineEdit(self.settings.value("default_location", os.getcwd()))
+        self.location_input = QLineEdit(self._cfg["default_location"])
+        self.location_input.textChanged.connect(self._course_folder_cache.clear)  # Paths depend on the location
         browse_btn = QPushButton("Browse")
         browse_btn.clicked.connect(self.browse_folder)
         location_layout.addWidget(self.location_input)
@@ -399,14 +643,14 @@ class MoodleDownloaderApp(QMainWindow):
         # Options
         left_layout.addWidget(QLabel("Options:"))
         self.headless_cb = QCheckBox("Headless mode")
-        self.headless_cb.setChecked(self.settings.value("headless", True, bool))
+        self.headless_cb.setChecked(self._cfg["headless"])
         self.organize_cb = QCheckBox("Organize by section (always on)")
         self.organize_cb.setChecked(True)
         self.organize_cb.setEnabled(False)
         self.full_download_cb = QCheckBox("Full download")
-        self.full_download_cb.setChecked(self.settings.value("full_download", False, bool))
+        self.full_download_cb.setChecked(self._cfg["full_download"])
         self.unzip_after_cb = QCheckBox("Unzip newly downloaded .zip files after completion")  # New option
-        self.unzip_after_cb.setChecked(self.settings.value("unzip_after", True, bool))
+        self.unzip_after_cb.setChecked(self._cfg["unzip_after"])
         self.unzip_after_cb.setEnabled(UNZIPPER_AVAILABLE)
         left_layout.addWidget(self.headless_cb)
         left_layout.addWidget(self.organize_cb)
@@ -423,14 +667,18 @@ class MoodleDownloaderApp(QMainWindow):
         right_layout.addWidget(QLabel("Academic Year:"))
         self.year_combo = QComboBox()
         self.year_combo.addItems(["2023-24", "2024-25", "2025-26", "2026-27"])
-        self.year_combo.setCurrentText(self.settings.value("year_range", "2025-26"))
+        self.year_combo.setCurrentText(self._cfg["year_range"])
         right_layout.addWidget(self.year_combo)
         
         # Search above course list
         right_layout.addWidget(QLabel("Available Courses:"))
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search name or ID...")
-        self.search_input.textChanged.connect(self.filter_courses)
+        # Filter once typing pauses instead of on every keystroke
+        self._filter_timer = QTimer(self, singleShot=True, interval=120)
+        self._filter_timer.timeout.connect(self.filter_courses)
+        self._last_search_term: Optional[str] = None
+        self.search_input.textChanged.connect(self._filter_timer.start)
         right_layout.addWidget(self.search_input)
         
         # Course list (made more compact)
@@ -474,19 +722,28 @@ class MoodleDownloaderApp(QMainWindow):
                 password = keyring.get_password("MoodleDownApp", username)
                 if password:
                     self.password_input.setText(password)
-            except:
-                pass
+            except (keyring.errors.KeyringError, RuntimeError) as e:
+                log.debug("Could not read saved password: %s", e)
         
-        # Load courses
+        # Load courses, migrating the older list-of-pairs format once
+        raw = self.settings.value("courses_json", "")
         try:
+            saved = json.loads(raw) if raw else None
+        except ValueError:
+            saved = None
+        if isinstance(saved, dict):
+            self.all_courses = {str(name): str(url) for name, url in saved.items()}
+        else:
             saved_data = self.settings.value("courses", [])
+            if not isinstance(saved_data, (list, tuple)):
+                saved_data = []
             self.all_courses = {str(item[0]): str(item[1]) for item in saved_data if isinstance(item, (list, tuple)) and len(item) == 2}
-            if not self.all_courses:
-                self.all_courses = COURSES.copy()
-            self.refresh_course_list()
-        except:
+            if self.all_courses:
+                self.save_courses()
+                self.settings.remove("courses")
+        if not self.all_courses:
             self.all_courses = COURSES.copy()
-            self.refresh_course_list()
+        self.refresh_course_list()
         
         # Remove first-time user suggestion
         # if not saved_data or len(saved_data) == 0:
@@ -494,23 +751,38 @@ class MoodleDownloaderApp(QMainWindow):
         #     QTimer.singleShot(500, self.suggest_autofill)
 
     def refresh_course_list(self):
-        self.course_list.clear()
-        for course_name in sorted(self.all_courses.keys()):
-            course_url = self.all_courses[course_name]
-            item = QListWidgetItem(f"{course_name}")
-            item.setData(Qt.UserRole, course_url)
-            item.setToolTip(f"Name: {course_name}\nURL: {course_url}")
-            self.course_list.addItem(item)
+        self._valid_course_urls = {url for url in self.all_courses.values() if is_valid_course_url(url)}
+        self._last_search_term = None  # New items are unfiltered
+        # Rebuild with repaints and selection signals suspended, then refresh once
+        self.course_list.setUpdatesEnabled(False)
+        self.course_list.blockSignals(True)
+        try:
+            self.course_list.clear()
+            for course_name in sorted(self.all_courses.keys()):
+                course_url = self.all_courses[course_name]
+                item = QListWidgetItem(f"{course_name}")
+                item.setData(Qt.UserRole, course_url)
+                item.setData(Qt.UserRole + 1, course_name.lower())  # Search key for filter_courses
+                item.setData(Qt.UserRole + 2, course_name)  # Key into all_courses
+                item.setToolTip(f"Name: {course_name}\nURL: {course_url}")
+                self.course_list.addItem(item)
+            self._items = tuple(self.course_list.item(i) for i in range(self.course_list.count()))
+        finally:
+            self.course_list.blockSignals(False)
+            self.course_list.setUpdatesEnabled(True)
+        self.update_selection()
 
     def filter_courses(self):
         search_term = self.search_input.text().lower()
-        for i in range(self.course_list.count()):
-            item = self.course_list.item(i)
-            item.setHidden(search_term not in item.text().lower())
+        if search_term == self._last_search_term:
+            return
+        self._last_search_term = search_term
+        for item in self._items:
+            item.setHidden(search_term not in item.data(Qt.UserRole + 1))
 
     def update_selection(self):
         """Refresh selection-dependent UI state."""
-        self.selected_courses = {item.text().split(" [ID: ")[0] for item in self.course_list.selectedItems()}
+        self.selected_courses = {item.data(Qt.UserRole + 2) for item in self.course_list.selectedItems()}
         count = len(self.selected_courses)
         is_downloading = self.current_worker and self.current_worker.is_alive()
         ready = getattr(self, 'browser_ready', False)
@@ -550,21 +822,29 @@ class MoodleDownloaderApp(QMainWindow):
             return
         
         if QMessageBox.question(self, "Confirm", f"Remove {len(items)} selected course(s)?") == QMessageBox.Yes:
-            for item in items:
-                name = item.text().split(" [ID: ")[0]
-                if name in self.all_courses:
-                    del self.all_courses[name]
-                self.course_list.takeItem(self.course_list.row(item))
+            self.course_list.setUpdatesEnabled(False)
+            self.course_list.blockSignals(True)
+            try:
+                for item in items:
+                    self.all_courses.pop(item.data(Qt.UserRole + 2), None)
+                    self.course_list.takeItem(self.course_list.row(item))
+                self._items = tuple(self.course_list.item(i) for i in range(self.course_list.count()))
+            finally:
+                self.course_list.blockSignals(False)
+                self.course_list.setUpdatesEnabled(True)
             self.save_courses()
             self.update_selection()
 
     def save_courses(self):
-        self.settings.setValue("courses", list(self.all_courses.items()))
+        self.settings.setValue("courses_json", json.dumps(self.all_courses, ensure_ascii=False))
 
     def start_download(self):
         if self.current_worker and self.current_worker.is_alive():
             QMessageBox.warning(self, "Busy", "Download already running.")
             return
+        if self.unzip_worker and self.unzip_worker.is_alive():
+            QMessageBox.warning(self, "Busy", "Please wait for unzipping to finish before starting a new download.")
+            return
         if not getattr(self, 'browser_ready', False):
             if ensure_chromium_available(self):
                 self.browser_ready = True
@@ -597,41 +877,51 @@ class MoodleDownloaderApp(QMainWindow):
                 return
         
         # Save settings
-        self.settings.setValue("username", username)
-        self.settings.setValue("default_location", download_folder)
-        self.settings.setValue("year_range", self.year_combo.currentText())
-        self.settings.setValue("headless", self.headless_cb.isChecked())
-        self.settings.setValue("full_download", self.full_download_cb.isChecked())
-        self.settings.setValue("save_password", self.save_password_cb.isChecked())
-        self.settings.setValue("unzip_after", self.unzip_after_cb.isChecked())
-        
-        # Handle password saving
+        self._save_setting("username", username)
+        self._save_setting("default_location", download_folder)
+        self._save_setting("year_range", self.year_combo.currentText())
+        self._save_setting("headless", self.headless_cb.isChecked())
+        self._save_setting("full_download", self.full_download_cb.isChecked())
+        self._save_setting("save_password", self.save_password_cb.isChecked())
+        self._save_setting("unzip_after", self.unzip_after_cb.isChecked())
+        
+        # Handle password saving off the UI thread; keychain backends can be slow. A password is
+        # only stored once a login accepts it, since a reused session never checks it
+        self._unverified_credentials = None
         if KEYRING_AVAILABLE:
-            try:
-                if self.save_password_cb.isChecked():
-                    keyring.set_password("MoodleDownApp", username, password)
-                else:
-                    keyring.delete_password("MoodleDownApp", username)
-            except:
-                pass
+            if self.save_password_cb.isChecked():
+                self._unverified_credentials = (username, password)
+            else:
+                CredentialsWorker(username, password, False).start()
         
         # Prepare course data
-        course_data = [(self.all_courses[name], name) for name in self.selected_courses if name in self.all_courses]
+        course_data = sorted(((url, name) for name in self.selected_courses
+                              if (url := self.all_courses.get(name))), key=lambda t: t[1])
         if not course_data:
             return
         
+        # Create every course folder in one pass before the workers start
+        for folder in sorted({self._course_folder(url, name, download_folder) for url, name in course_data
+                             if is_valid_course_url(url)}):
+            try:
+                os.makedirs(folder, exist_ok=True)
+            except OSError as e:
+                QMessageBox.critical(self, "Error", f"Could not create folder: {e}")
+                return
+        
         # Mark start time for selective unzip logic
         self.download_start_time = time.time()
         
         # Start worker
         if len(course_data) == 1:
-            self.current_worker = DownloadWorker(course_data[0][0], course_data[0][1], username, password, download_folder, self.settings)
+            self.current_worker = DownloadWorker(course_data[0][0], course_data[0][1], username, password, download_folder, dict(self._cfg))
         else:
-            self.current_worker = BatchDownloadWorker(course_data, username, password, download_folder, self.settings)
+            self.current_worker = BatchDownloadWorker(course_data, username, password, download_folder, dict(self._cfg))
         
         self.current_worker.signals.status.connect(self.update_status)
         self.current_worker.signals.progress.connect(self.update_progress)
         self.current_worker.signals.finished.connect(self.download_finished)
+        self.current_worker.signals.credentials_verified.connect(self._store_verified_credentials)
         
         self.set_downloading_state(True)
         self.current_worker.start()
@@ -642,13 +932,30 @@ class MoodleDownloaderApp(QMainWindow):
         self.course_list.setEnabled(not downloading)
 
     def update_status(self, message):
+        # Queued status signals collapse to the latest one, applied once per event loop pass
+        if self._pending_status is None:
+            QTimer.singleShot(0, self._apply_status)
+        self._pending_status = message
+
+    def _apply_status(self):
+        message, self._pending_status = self._pending_status, None
+        if message is None:
+            return  # Discarded by download_finished
         self.statusBar().showMessage(message)
         self.status_label.setText(message[:100] + "..." if len(message) > 100 else message)
 
     def update_progress(self, value):
         self.progress_bar.setValue(int(value))
 
+    def _store_verified_credentials(self):
+        """Save the password of the running download once a login has accepted it."""
+        if self._unverified_credentials:
+            CredentialsWorker(*self._unverified_credentials, True).start()
+            self._unverified_credentials = None
+
     def download_finished(self, success, message):
+        self._pending_status = None  # Keep a late status update from overwriting the result
+        self._unverified_credentials = None  # Never accepted by a login during this run
         self.set_downloading_state(False)
         self.progress_bar.setValue(100 if success else 0)
         self.status_label.setText("Complete" if success else "Failed")
@@ -665,76 +972,64 @@ class MoodleDownloaderApp(QMainWindow):
                 self.password_input.setFocus()
                 # Remove saved wrong password
                 if KEYRING_AVAILABLE:
-                    try:
-                        keyring.delete_password("MoodleDownApp", self.username_input.text().strip())
-                        self.save_password_cb.setChecked(False)
-                    except:
-                        pass
+                    CredentialsWorker(self.username_input.text().strip(), "", False).start()
+                    self.save_password_cb.setChecked(False)
             else:
                 QMessageBox.warning(self, "Failed", message)
         
         # Perform selective unzip if requested and module available
         if self.unzip_after_cb.isChecked() and UNZIPPER_AVAILABLE:
-            try:
-                self.statusBar().showMessage("Unzipping newly downloaded archives...")
-                QApplication.processEvents()
-                self._unzip_new_archives()
-                self.statusBar().showMessage("Unzip complete")
-            except Exception as e:
-                QMessageBox.warning(self, "Unzip Error", f"Selective unzip failed: {e}")
+            self.statusBar().showMessage("Unzipping newly downloaded archives...")
+            self._unzip_new_archives()
         
         self.current_worker = None
         self.update_selection()
 
+    def _course_folder(self, url: str, course_name: str, base_dir: str) -> str:
+        """Resolve a course folder path, cached until the download location changes."""
+        key = (url, course_name)
+        folder = self._course_folder_cache.get(key)
+        if folder is None:
+            folder = self._course_folder_cache[key] = get_course_folder_path(url, base_dir, course_name)
+        return folder
+
     def _unzip_new_archives(self):
-        """Unzip only .zip files created/modified during this download session for selected courses."""
+        """Unzip only .zip files created/modified during this download session for selected courses.
+
+        Extraction runs on an UnzipWorker; only called when the unzipper module is available.
+        """
         if not self.download_start_time:
             return
         base_download_dir = self.location_input.text().strip()
         if not os.path.isdir(base_download_dir):
             return
         # Build list of course folders that were part of this session
-        target_folders = []
+        target_folders = {}  # Ordered set: courses resolving to the same folder are walked once
         for course_name in self.selected_courses:
             url = self.all_courses.get(course_name)
-            if not url:
-                continue
-            if not is_valid_course_url(url):
+            if url not in self._valid_course_urls:
                 continue
             # Replicate folder naming logic used during download
-            folder_path = create_course_folder(url, base_download_dir, course_name)
-            if os.path.isdir(folder_path):
-                target_folders.append(folder_path)
-        processed = 0
-        extracted = 0
-        errors = 0
-        cutoff = self.download_start_time - 2  # Small grace period
-        for folder in target_folders:
-            for root, _, files in os.walk(folder):
-                for f in files:
-                    if not f.lower().endswith('.zip'):
-                        continue
-                    path = os.path.join(root, f)
-                    try:
-                        mtime = os.path.getmtime(path)
-                        if mtime < cutoff:
-                            continue  # Skip old archives
-                        processed += 1
-                        with zipfile.ZipFile(path, 'r') as zf:
-                            zf.extractall(root)
-                        extracted += 1
-                        # Optionally delete after extraction (disabled)
-                        # os.remove(path)
-                        self.statusBar().showMessage(f"Unzipped: {os.path.relpath(path, folder)}")
-                        QApplication.processEvents()
-                    except Exception:
-                        errors += 1
-        summary = f"Selective unzip done. New archives: {processed}, Extracted: {extracted}, Errors: {errors}"
+            folder_path = self._course_folder(url, course_name, base_download_dir)
+            if folder_path not in target_folders and os.path.isdir(folder_path):
+                target_folders[folder_path] = None
+        if not target_folders:
+            self.status_label.setText("Nothing to unzip.")
+            self.statusBar().showMessage("Nothing to unzip")
+            return
+        self.unzip_worker = UnzipWorker(list(target_folders), self.download_start_time - 2)  # Small grace period
+        self.unzip_worker.signals.status.connect(self.statusBar().showMessage)
+        self.unzip_worker.signals.finished.connect(self.unzip_finished)
+        self.unzip_worker.start()
+
+    def unzip_finished(self, success: bool, summary: str):
         self.status_label.setText(summary)
-        if errors:
-            QMessageBox.warning(self, "Unzip Completed with Errors", summary)
-        else:
+        self.statusBar().showMessage("Unzip complete")
+        if success:
             QMessageBox.information(self, "Unzip Completed", summary)
+        else:
+            QMessageBox.warning(self, "Unzip Completed with Errors", summary)
+        self.unzip_worker = None
 
     def autofill_courses(self):
         """Automatically extract courses from Moodle dashboard and add them to the course list."""
@@ -745,6 +1040,10 @@ class MoodleDownloaderApp(QMainWindow):
         if hasattr(self, 'autofill_worker') and self.autofill_worker and self.autofill_worker.is_alive():
             QMessageBox.warning(self, "Busy", "Auto-fill operation already in progress.")
             return
+
+        if self.unzip_worker and self.unzip_worker.is_alive():
+            QMessageBox.warning(self, "Busy", "Please wait for unzipping to finish.")
+            return
         
         if not getattr(self, 'browser_ready', False):
             if ensure_chromium_available(self):
@@ -818,20 +1117,22 @@ class MoodleDownloaderApp(QMainWindow):
         # Always merge (add new courses without removing existing ones)
         added = 0
         skipped = 0
+        existing = self.all_courses
         for course in courses:
             name = course['name']
             url = course['href']
             
             # Skip if already exists
-            if name in self.all_courses:
+            if name in existing:
                 skipped += 1
                 continue
             
-            self.all_courses[name] = url
+            existing[name] = url
             added += 1
         
-        self.refresh_course_list()
-        self.save_courses()
+        if added:
+            self.refresh_course_list()
+            QTimer.singleShot(0, self.save_courses)  # Saved while the result dialog is up
         
         # Show results
         result_msg = f"Successfully extracted {len(courses)} courses.\n"
@@ -852,11 +1153,16 @@ def main():
     QApplication.setOrganizationName("MoodleDown")
     QApplication.setApplicationName("MoodleDownApp")
     app = QApplication(sys.argv)
+    # Each worker drives its own Playwright browser; bound how many run at once
+    QThreadPool.globalInstance().setMaxThreadCount(min(4, QThread.idealThreadCount()))
+    # Probe Chromium while the widgets are being constructed
+    chromium_probe = ChromiumProbe()
+    chromium_probe.start()
     # Apply dark theme if available
     if QDARKSTYLE_AVAILABLE:
         app.setStyleSheet(qdarkstyle.load_stylesheet_pyqt5())
 
-    window = MoodleDownloaderApp()
+    window = MoodleDownloaderApp(chromium_probe)
     window.show()
     window.raise_()
     window.activateWindow()
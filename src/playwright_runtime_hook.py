@@ -10,8 +10,8 @@ def _ensure_env():
 	if "PLAYWRIGHT_BROWSERS_PATH" in os.environ:
 		return
 	base_root = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+	# The folder itself is created lazily by chromium_setup._browser_store
 	target = os.path.join(base_root, "MoodleDown", "pw-browsers")
-	os.makedirs(target, exist_ok=True)
 	os.environ["PLAYWRIGHT_BROWSERS_PATH"] = target
 
 _ensure_env()
@@ -1,10 +1,155 @@
 import os
 import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import argparse
 import sys
 import time # Added for potential throttling if needed
 
-def unzip_recursive(folder_path, status_callback=None):
+COPY_BUFFER_SIZE = 1 << 20  # Bytes read per member chunk during extraction
+DEFAULT_MAX_WORKERS = min(8, os.cpu_count() or 1)  # Archives extracted at once by unzip_recursive
+_ZIP_EXT = '.zip'
+_WINDOWS_INVALID = str.maketrans(dict.fromkeys(':<>|"?*', '_'))
+
+
+def _member_path(filename, extract_to):
+    # Same sanitizing as ZipFile.extractall: no absolute paths, drives or '..' components
+    arcname = filename.replace('/', os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [x for x in arcname.split(os.path.sep) if x not in ('', os.path.curdir, os.path.pardir)]
+    if os.path.sep == '\\':
+        parts = [x.translate(_WINDOWS_INVALID).rstrip('.') or '_' for x in parts]
+    return os.path.join(extract_to, *parts) if parts else None
+
+
+def _member_mtime(info):
+    # Zip timestamps are local time with 2 second resolution; None when the stored date is invalid
+    try:
+        return time.mktime(info.date_time + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return None
+
+
+def _is_extracted(target, info, member_mtime):
+    try:
+        st = os.stat(target)
+    except OSError:
+        return False
+    return st.st_size == info.file_size and member_mtime is not None and st.st_mtime + 2 >= member_mtime
+
+
+def _fadvise(f, advice):
+    # Read-ahead hint for bulk I/O; a no-op where posix_fadvise is unavailable (Windows, macOS)
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, getattr(os, advice))
+        except (OSError, AttributeError, ValueError):
+            pass
+
+
+def extract_zip(zip_filepath, extract_to, buffer=None):
+    """Extract every member of a zip into extract_to, copying through one reusable buffer.
+
+    Members already on disk with the same size and a timestamp at least as new are skipped,
+    and written files get the member's timestamp, so extracting an archive again is cheap.
+    Pass the same bytearray as ``buffer`` across calls to avoid reallocating it per archive.
+    Returns False when every file in the archive was already up to date, True otherwise.
+    """
+    view = memoryview(buffer if buffer is not None else bytearray(COPY_BUFFER_SIZE))
+    made_dirs = set()
+    files = written = 0
+    with zipfile.ZipFile(zip_filepath, 'r') as zip_ref:
+        _fadvise(zip_ref.fp, 'POSIX_FADV_SEQUENTIAL')
+        for info in zip_ref.infolist():
+            target = _member_path(info.filename, extract_to)
+            if target is None:
+                continue
+            directory = target if info.is_dir() else os.path.dirname(target)
+            if directory not in made_dirs:
+                os.makedirs(directory, exist_ok=True)
+                made_dirs.add(directory)
+            if info.is_dir():
+                continue
+            files += 1
+            member_mtime = _member_mtime(info)
+            if _is_extracted(target, info, member_mtime):
+                continue
+            written += 1
+            with zip_ref.open(info) as src, open(target, 'wb') as out:
+                while True:
+                    n = src.readinto(view)
+                    if not n:
+                        break
+                    out.write(view[:n])
+            if member_mtime is not None:
+                os.utime(target, (time.time(), member_mtime))
+    return written > 0 or files == 0
+
+
+def iter_zip_entries(root):
+    """Yield (path, stat_result) for every .zip file under root.
+
+    Uses os.scandir so each archive costs one stat, and the directory type checks
+    come from the scan itself. Unreadable folders are skipped like os.walk does.
+    """
+    pending = deque([root])
+    push, pop, scandir = pending.append, pending.popleft, os.scandir
+    while pending:
+        directory = pop()
+        try:
+            with scandir(directory) as it:
+                for entry in it:
+                    try:
+                        name = entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            push(entry.path)
+                        elif len(name) > 4 and name[-4:].lower() == _ZIP_EXT:  # Lowercases 4 chars, not the name
+                            yield entry.path, entry.stat()
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def group_by_directory(zip_entries):
+    """Group (path, stat_result) entries by the directory the archives extract into.
+
+    Archives in one directory may contain the same member paths, so a group must be
+    extracted in order (walk order is kept, the last archive wins); separate groups
+    can run in parallel. Groups come largest first so a big one doesn't start last.
+    """
+    groups = {}
+    for entry in zip_entries:
+        groups.setdefault(os.path.dirname(entry[0]), []).append(entry)
+    return sorted(groups.values(), key=lambda group: sum(st.st_size for _, st in group), reverse=True)
+
+
+def _extract_group(zip_entries):
+    return [_extract_one(zip_entry) for zip_entry in zip_entries]
+
+
+def _extract_one(zip_entry):
+    """Extract a zip next to itself; returns (success, status message)."""
+    zip_filepath, _ = zip_entry
+    # Extract in the same directory as the zip file
+    extract_to_dir, filename = os.path.split(zip_filepath)
+    try:
+        if not extract_zip(zip_filepath, extract_to_dir):
+            return True, f"  Already extracted: {filename}"
+        # Optionally, delete the zip file after successful extraction
+        # os.remove(zip_filepath)
+        return True, f"  Extracted: {filename}"
+    except zipfile.BadZipFile:
+        return False, f"  Error: Corrupt zip file - {filename}"
+    except PermissionError:
+        return False, f"  Error: Permission denied for {filename}"
+    except Exception as e:
+        return False, f"  Error: Unexpected error extracting {filename}: {e}"
+
+
+def unzip_recursive(folder_path, status_callback=None, max_workers=None):
 
     if not os.path.isdir(folder_path):
         message = f"Error: Folder not found or is not a directory: {folder_path}"
@@ -26,58 +171,37 @@ def unzip_recursive(folder_path, status_callback=None):
     extracted_count = 0
     error_count = 0
 
-    try:
-        for dirpath, dirnames, filenames in os.walk(folder_path):
-            # Filter out potential recursion into extracted directories if named '.zip'
-            # dirnames[:] = [d for d in dirnames if not d.lower().endswith('.zip')] # Optional: Prevent recursion into dirs named like zips
-
-            for filename in filenames:
-                if filename.lower().endswith('.zip'):
-                    found_zips += 1
-                    zip_filepath = os.path.join(dirpath, filename)
-                    # Extract in the same directory as the zip file
-                    extract_to_dir = dirpath
-
-                    status_msg = f"Found: {os.path.relpath(zip_filepath, folder_path)}"
-                    if status_callback: status_callback(status_msg)
-                    else: print(status_msg)
+    def report(fmt, *args):
+        # %-style so callers pass raw values and the message is formatted once, here
+        message = fmt % args if args else fmt
+        if status_callback: status_callback(message)
+        else: print(message)
 
-                    try:
-                        with zipfile.ZipFile(zip_filepath, 'r') as zip_ref:
-                            # Add a small delay/yield if UI becomes unresponsive on huge archives
-                            # time.sleep(0.01) # Example - usually not needed
-                            zip_ref.extractall(extract_to_dir)
-                        status_msg = f"  Extracted: {filename}"
-                        if status_callback: status_callback(status_msg)
-                        else: print(status_msg)
-                        extracted_count += 1
-                        # Optionally, delete the zip file after successful extraction
-                        # os.remove(zip_filepath)
-                    except zipfile.BadZipFile:
-                        error_msg = f"  Error: Corrupt zip file - {filename}"
-                        if status_callback: status_callback(error_msg)
-                        else: print(error_msg)
-                        error_count += 1
-                    except PermissionError:
-                        error_msg = f"  Error: Permission denied for {filename}"
-                        if status_callback: status_callback(error_msg)
-                        else: print(error_msg)
-                        error_count += 1
-                    except Exception as e:
-                        error_msg = f"  Error: Unexpected error extracting {filename}: {e}"
-                        if status_callback: status_callback(error_msg)
-                        else: print(error_msg)
-                        error_count += 1
-                    # Add a small delay between files if needed
-                    # time.sleep(0.05)
-            # Process events if called from GUI thread often (better to use worker thread)
-            # QApplication.processEvents() # Only if running in main thread, not ideal
+    try:
+        zip_entries = list(iter_zip_entries(folder_path))
     except Exception as walk_err:
-         error_msg = f"Error during directory walk: {walk_err}"
-         if status_callback: status_callback(error_msg)
-         else: print(error_msg)
+         report("Error during directory walk: %s", walk_err)
+         zip_entries = []
          error_count += 1 # Count this as an error
 
+    found_zips = len(zip_entries)
+    # Walked paths all start with folder_path, so slicing replaces os.path.relpath's getcwd/normalize work
+    prefix_len = len(os.path.join(folder_path, ''))
+    for zip_filepath, _ in zip_entries:
+        report("Found: %s", zip_filepath[prefix_len:])
+
+    # Directories extract in parallel, the archives within one in turn; results are reported from this thread
+    groups = group_by_directory(zip_entries)
+    workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(groups)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(_extract_group, groups):
+            for ok, message in results:
+                report(message)
+                if ok:
+                    extracted_count += 1
+                else:
+                    error_count += 1
+
     summary_message = (f"Unzip finished. Found: {found_zips}, Extracted: {extracted_count}, Errors: {error_count}")
     if status_callback:
         status_callback(summary_message)
@@ -2,89 +2,22 @@
 Test script for course_extractor module
 """
 
+import functools
+from pathlib import Path
+
 from src.course_extractor import extract_courses
 
-# Sample HTML similar to Moodle dashboard structure
-sample_html = html_data = """
-<section id="inst310297" class=" block_myoverview block item1 card mb-3" role="region" data-block="myoverview" data-instance-id="310297" aria-labelledby="instance-310297-header">
-    <div class="card-body p-3">
-        <h5 id="instance-310297-header" class="card-title d-inline">הקורסים שלי</h5>
-        <div class="card-text content mt-3">
-            <div id="block-myoverview-68f2230a9698e68f2230a969901" class="block-myoverview block-cards" data-region="myoverview" role="navigation" data-init="true">
-                <div id="courses-view-68f2230a9698e68f2230a969901">
-                    <div id="page-container-7">
-                        <div data-region="paged-content-page" data-page="1">
-                            <ul class="list-group">
-                                <li class="list-group-item course-listitem">
-                                    <div class="row">
-                                        <div class="col-md-9 d-flex flex-column">
-                                            <a href="https://moodle.huji.ac.il/2024-25/course/view.php?id=2098" class="aalink coursename">
-                                                <span class="sr-only">Course is starred</span>
-                                                עקרונות ויישומים בניתוח סטטיסטי
-                                            </a>
-                                        </div>
-                                    </div>
-                                </li>
-                                <li class="list-group-item course-listitem">
-                                    <div class="row">
-                                        <div class="col-md-9 d-flex flex-column">
-                                            <a href="https://moodle.huji.ac.il/2024-25/course/view.php?id=2105" class="aalink coursename">
-                                                מבני נתונים ואלגוריתמים
-                                            </a>
-                                        </div>
-                                    </div>
-                                </li>
-                                <li class="list-group-item course-listitem">
-                                    <div class="row">
-                                        <div class="col-md-9 d-flex flex-column">
-                                            <a href="https://moodle.huji.ac.il/2024-25/course/view.php?id=517" class="aalink coursename">
-                                                מבוא לחקר השפה
-                                            </a>
-                                        </div>
-                                    </div>
-                                </li>
-                                <li class="list-group-item course-listitem">
-                                    <div class="row">
-                                        <div class="col-md-9 d-flex flex-column">
-                                            <a href="https://moodle.huji.ac.il/2024-25/course/view.php?id=532" class="aalink coursename">
-                                                חישוביות וקוגניציה
-                                            </a>
-                                        </div>
-                                    </div>
-                                </li>
-                                <li class="list-group-item course-listitem">
-                                    <div class="row">
-                                        <div class="col-md-9 d-flex flex-column">
-                                            <a href="https://moodle.huji.ac.il/2024-25/course/view.php?id=516" class="aalink coursename">
-                                                סמינריון לבוגר 
-                                            </a>
-                                        </div>
-                                    </div>
-                                </li>
-                                <li class="list-group-item course-listitem">
-                                    <div class="row">
-                                        <div class="col-md-9 d-flex flex-column">
-                                            <a href="https://moodle.huji.ac.il/2024-25/course/view.php?id=543" class="aalink coursename">
-                                                נוירוביולוגיה של התפתחות ולמידה
-                                            </a>
-                                        </div>
-                                    </div>
-                                </li>
-                            </ul>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-</section>
-"""
+
+@functools.lru_cache(maxsize=None)
+def _sample_html():
+    """Load the sample Moodle dashboard HTML fixture."""
+    return (Path(__file__).parent / 'fixtures' / 'dashboard.html').read_text(encoding='utf-8')
 
 def test_extract_courses():
     """Test the extract_courses function with sample HTML."""
     print("Testing course extraction...")
     
-    courses = extract_courses(sample_html)
+    courses = extract_courses(_sample_html())
     
     print(f"\nExtracted {len(courses)} courses:")
     for i, course in enumerate(courses, 1):
@@ -6,13 +6,15 @@ import unittest
 import re
 from src.data_structures import Course, DownloadResult
 
+_COURSE_RE = re.compile(r'/course/view\.php')
+
 
 def is_valid_course_url(url: str) -> bool:
     """Check if URL is a valid Moodle course URL."""
     if not url:
         return False
     # Check if it's a course URL - look for course/view.php pattern
-    return bool(re.search(r'/course/view\.php', url))
+    return _COURSE_RE.search(url) is not None
 
 
 class TestMoodleDownloader(unittest.TestCase):